@@ -1,65 +1,385 @@
 import struct
+from array import array
 
 from compressor.base import Compressor
+from compressor.match_finder import NICE_LENGTH, copy_match, make_match_finder
+
+
+def _group_layout(flags: int) -> tuple[int, ...]:
+    """
+    Раскладка группы токенов по управляющему байту: число подряд идущих литералов
+    перед каждой ссылкой и после последней, например 0b00000100 -> (2, 5).
+    """
+    layout = []
+    run = 0
+    for bit in range(8):
+        if flags >> bit & 1:
+            layout.append(run)
+            run = 0
+        else:
+            run += 1
+    layout.append(run)
+    return tuple(layout)
+
+
+# Раскладки для всех 256 значений управляющего байта
+GROUP_LAYOUTS = [_group_layout(flags) for flags in range(256)]
 
 
 class LZSSCompressor(Compressor):
-    def __init__(self, window_size=10000, lookahead_buffer_size=500, min_match_length=3):
+    # Уровни сжатия: разбор потока на токены и параметры поиска совпадений по умолчанию
+    EFFORT_LEVELS = {
+        "fast": {"parser": "greedy", "match_finder": "hash_chain", "search_depth": 16},
+        "default": {"parser": "lazy", "match_finder": "hash_chain", "search_depth": 64},
+        "max": {"parser": "optimal", "match_finder": "binary_tree", "search_depth": 256},
+    }
+    # Версия потока; старый формат начинается с флага токена 0 или 1
+    FORMAT_VERSION = 2
+    # Размер порции, читаемой из файла при потоковом сжатии и восстановлении
+    STREAM_CHUNK_SIZE = 1 << 16
+    # [версия][min_match_length][ширина offset][ширина length][window_size]
+    HEADER = struct.Struct(">BBBBI")
+
+    def __init__(self, window_size=10000, lookahead_buffer_size=500, min_match_length=3,
+                 match_finder=None, search_depth=None, effort="default"):
+        """
+        :param window_size: размер буфера поиска (в байтах)
+        :param lookahead_buffer_size: размер буфера просмотра (максимальная длина совпадения)
+        :param min_match_length: минимальная длина совпадения, кодируемая ссылкой
+        :param match_finder: алгоритм поиска совпадений: "hash_chain" (хеш-цепочки)
+            или "binary_tree" (двоичные деревья, для больших окон); None — по уровню effort
+        :param search_depth: глубина поиска на каждой позиции (длина цепочки или число узлов дерева);
+            None — по уровню effort
+        :param effort: уровень сжатия: "fast" (жадный разбор), "default" (ленивый разбор
+            с просмотром на одну позицию вперёд) или "max" (оптимальный разбор по стоимости токенов)
+        """
+        if effort not in self.EFFORT_LEVELS:
+            raise ValueError(f"Неизвестный уровень сжатия LZSS: {effort}")
+        preset = self.EFFORT_LEVELS[effort]
         self.window_size = window_size
         self.lookahead_buffer_size = lookahead_buffer_size
         self.min_match_length = min_match_length
+        self.effort = effort
+        self.parser = preset["parser"]
+        self.match_finder = match_finder or preset["match_finder"]
+        self.search_depth = search_depth or preset["search_depth"]
+
+    def _field_widths(self) -> tuple[int, int]:
+        """
+        Ширина полей ссылки в байтах: offset — до window_size,
+        length — до lookahead_buffer_size - min_match_length (хранится длина минус минимум).
+        """
+        offset_bytes = max(1, (self.window_size.bit_length() + 7) // 8)
+        length_bytes = max(1, ((self.lookahead_buffer_size - self.min_match_length).bit_length() + 7) // 8)
+        return offset_bytes, length_bytes
+
+    def _parse_greedy(self, data: bytes, finder, start: int, stop: int):
+        """
+        Жадный разбор: на каждой позиции берётся наибольшее найденное совпадение.
+        Разбирает data начиная с start, пока позиция меньше stop; совпадения могут
+        продолжаться за stop до конца data.
+        Возвращает токены (длина, смещение) для ссылок и (0, байт) для литералов.
+        """
+        pos = start
+        while pos < stop:
+            match_length, match_offset = finder.find(pos)
+            if match_length >= self.min_match_length:
+                yield match_length, match_offset
+                for skipped in range(pos + 1, pos + match_length):
+                    finder.insert(skipped)
+                pos += match_length
+            else:
+                yield 0, data[pos]
+                pos += 1
+
+    def _parse_lazy(self, data: bytes, finder, start: int, stop: int):
+        """
+        Ленивый разбор: найденное совпадение откладывается, если на следующей позиции
+        начинается более длинное — тогда текущий байт уходит литералом.
+        """
+        pos, n = start, len(data)
+        match_length, match_offset = finder.find(pos)
+        while pos < stop:
+            if match_length < self.min_match_length:
+                yield 0, data[pos]
+                pos += 1
+                if pos < stop:
+                    match_length, match_offset = finder.find(pos)
+                continue
+
+            if pos + 1 < n:
+                next_length, next_offset = finder.find(pos + 1)
+                if next_length > match_length:
+                    yield 0, data[pos]
+                    pos += 1
+                    match_length, match_offset = next_length, next_offset
+                    continue
+                skipped_from = pos + 2
+            else:
+                next_length = next_offset = 0
+                skipped_from = pos + 1
+
+            yield match_length, match_offset
+            for skipped in range(skipped_from, pos + match_length):
+                finder.insert(skipped)
+            pos += match_length
+            if pos >= stop:
+                break
+            if match_length == 1:
+                # Позиция уже найдена и добавлена просмотром вперёд: повторный поиск нашёл бы её саму
+                match_length, match_offset = next_length, next_offset
+            else:
+                match_length, match_offset = finder.find(pos)
+
+    def _parse_optimal(self, data: bytes, finder, start: int, stop: int):
+        """
+        Оптимальный разбор: кратчайший путь от начала к концу данных, где переход —
+        литерал или совпадение любой допустимой длины, а вес — размер токена в битах.
+        Наибольшие совпадения ищутся для всех позиций; любой их префикс — тоже совпадение.
+        Совпадения длиннее NICE_LENGTH берутся целиком, чтобы не перебирать все длины,
+        а позиции внутри них только добавляются в искатель: их совпадения — хвосты
+        найденного с тем же смещением, так что повторный поиск не нужен.
+        Путь считается до конца data, а токены выдаются, пока позиция меньше stop.
+        """
+        n = len(data)
+        min_match = self.min_match_length
+        lengths = array("i", [0]) * n
+        offsets = array("i", [0]) * n
+        offset_bytes, length_bytes = self._field_widths()
+        literal_cost = 9
+        match_cost = 1 + 8 * (offset_bytes + length_bytes)
+        pos = start
+        while pos < n:
+            longest, offset = finder.find(pos)
+            lengths[pos], offsets[pos] = longest, offset
+            pos += 1
+            if longest > NICE_LENGTH:
+                for covered in range(pos, pos + longest - 1):
+                    finder.insert(covered)
+                    lengths[covered] = longest - (covered - pos) - 1
+                    offsets[covered] = offset
+                pos += longest - 1
+
+        # cost[i] — минимальный размер кодирования data[i:], choice[i] — длина первого токена
+        cost = array("q", [0]) * (n + 1)
+        choice = array("i", [1]) * n
+        for pos in range(n - 1, start - 1, -1):
+            best = cost[pos + 1] + literal_cost
+            best_length = 1
+            longest = lengths[pos]
+            if longest >= min_match:
+                shortest = longest if longest > NICE_LENGTH else min_match
+                for length in range(shortest, longest + 1):
+                    candidate = cost[pos + length] + match_cost
+                    if candidate < best:
+                        best = candidate
+                        best_length = length
+            cost[pos] = best
+            choice[pos] = best_length
+
+        pos = start
+        while pos < stop:
+            length = choice[pos]
+            yield (length, offsets[pos]) if length > 1 else (0, data[pos])
+            pos += length
+
+    def _header(self) -> bytes:
+        offset_bytes, length_bytes = self._field_widths()
+        return self.HEADER.pack(self.FORMAT_VERSION, self.min_match_length, offset_bytes, length_bytes,
+                                self.window_size)
+
+    def _pack_groups(self, tokens):
+        """
+        Упаковывает токены в группы по 8 с управляющим байтом и выдаёт каждую
+        группу по готовности (последняя может быть неполной).
+        """
+        offset_bytes, length_bytes = self._field_widths()
+        min_match = self.min_match_length
+        group = bytearray(1)
+        bit = 0
+        for match_length, value in tokens:
+            if match_length:
+                group[0] |= 1 << bit
+                group += value.to_bytes(offset_bytes, "big")
+                group += (match_length - min_match).to_bytes(length_bytes, "big")
+            else:
+                group.append(value)
+            bit += 1
+            if bit == 8:
+                yield group
+                group = bytearray(1)
+                bit = 0
+        if bit:
+            yield group
 
     def compress(self, data: bytes) -> bytes:
         """
+        Данные разбиваются на токены парсером уровня effort (поиск совпадений —
+        искателем match_finder по ключам из min_match_length байтов, не глубже search_depth).
+        Формат: [версия][min_match_length][ширина offset][ширина length] (по 1 байту),
+        [window_size] (4 байта), затем группы до 8 токенов, каждой из которых предшествует управляющий байт:
+        бит i (от младшего) равен 1, если i-й токен группы — ссылка.
+          - Ссылка: offset и length - min_match_length, big-endian, ширины из заголовка.
+          - Литерал: сам байт.
+        """
+        if not data:
+            return b""
+        finder = make_match_finder(self.match_finder, data, self.window_size, self.lookahead_buffer_size,
+                                   self.min_match_length, self.search_depth)
+        tokens = getattr(self, f"_parse_{self.parser}")(data, finder, 0, len(data))
+        return self._header() + b"".join(self._pack_groups(tokens))
 
-        Для каждой позиции:
-          - Ищется наибольшее совпадение в буфере поиска.
-          - Если длина совпадения >= min_match_length, формируется ссылка:
-              Токен ссылки: [flag=1 (1 байт)] + [offset (2 байта)] + [length (1 байт)].
-              Позиция увеличивается на match_length.
-          - Иначе, формируется литерал:
-              Токен литерала: [flag=0 (1 байт)] + [literal (1 байт)].
-              Позиция увеличивается на 1.
+    def _stream_tokens(self, src):
+        """
+        Разбирает поток по сегментам. Буфер хранит не больше window_size байтов истории
+        перед текущей позицией и ещё не разобранные данные; для каждого сегмента строится
+        новый искатель, в который сначала добавляются позиции истории. Разбор сегмента
+        останавливается за lookahead_buffer_size байтов до конца буфера (кроме конца
+        потока), чтобы совпадения не обрывались на границе чтения.
+        """
+        window = self.window_size
+        chunk_size = max(self.STREAM_CHUNK_SIZE, window)
+        parse = getattr(self, f"_parse_{self.parser}")
+        buffer = bytearray()
+        start = 0
+        eof = False
+        while not eof:
+            chunk = src.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            stop = len(buffer) if eof else len(buffer) - self.lookahead_buffer_size
+            if stop > start:
+                data = bytes(buffer)
+                finder = make_match_finder(self.match_finder, data, window, self.lookahead_buffer_size,
+                                           self.min_match_length, self.search_depth)
+                for pos in range(start):
+                    finder.insert(pos)
+                for match_length, value in parse(data, finder, start, stop):
+                    yield match_length, value
+                    start += match_length or 1
+            # Сдвигаем буфер, оставляя window_size байтов истории
+            drop = max(0, start - window)
+            del buffer[:drop]
+            start -= drop
+
+    def compress_stream(self, src, dst):
+        """
+        Потоковое сжатие из двоичного файлового объекта src в dst в том же формате, что и у compress().
+        Память ограничена окном, порцией чтения и буфером просмотра, а не размером входа.
+        """
+        groups = self._pack_groups(self._stream_tokens(src))
+        first = next(groups, None)
+        if first is None:
+            return
+        out = bytearray(self._header())
+        out += first
+        for group in groups:
+            out += group
+            if len(out) >= self.STREAM_CHUNK_SIZE:
+                dst.write(out)
+                out.clear()
+        dst.write(out)
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Читает управляющий байт и до 8 токенов за ним. Серии литералов группы
+        (по таблице GROUP_LAYOUTS) копируются одним срезом; поля ссылки читаются одним int.from_bytes.
+        Потоки старого формата (без заголовка) разбираются _decompress_legacy.
         """
         if not data:
             return b""
-        pos, n = 0, len(data)
+        if data[0] < self.FORMAT_VERSION:
+            return self._decompress_legacy(data)
+        if data[0] != self.FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата LZSS: {data[0]}")
+
         out = bytearray()
+        self._decode_groups(data, self.HEADER.size, len(data), out, data[1], data[2], data[3])
+        return bytes(out)
 
-        while pos < n:
-            start = max(0, pos - self.window_size)
-            search = data[start:pos]
-            match_length = 0
-            match_offset = 0
-            limit = min(self.lookahead_buffer_size, n - pos)
-
-            for length in range(1, limit + 1):
-                idx = search.rfind(data[pos:pos + length])
-                if idx != -1:
-                    match_length = length
-                    match_offset = len(search) - idx
-                else:
+    @staticmethod
+    def _decode_groups(data, pos: int, end: int, out: bytearray,
+                       min_match: int, offset_bytes: int, length_bytes: int) -> int:
+        """
+        Декодирует группы токенов из data[pos:end] в out; группа, обрезанная концом end,
+        считается последней в потоке.
+        :return: позиция после разобранных данных
+        """
+        match_bytes = offset_bytes + length_bytes
+        length_bits = 8 * length_bytes
+        length_mask = (1 << length_bits) - 1
+        from_bytes = int.from_bytes
+
+        while pos < end:
+            *runs, tail = GROUP_LAYOUTS[data[pos]]
+            pos += 1
+            for run in runs:
+                if run:
+                    out += data[pos:min(pos + run, end)]
+                    pos += run
+                if pos >= end:
                     break
+                # offset и length читаются одним числом и разделяются сдвигом
+                fields = from_bytes(data[pos:pos + match_bytes], "big")
+                pos += match_bytes
+                offset = fields >> length_bits
+                length = (fields & length_mask) + min_match
+                copy_match(out, offset, length)
+            out += data[pos:min(pos + tail, end)]
+            pos += tail
 
-            if match_length >= self.min_match_length:
-                # ссылка: flag=1, offset (4 bytes), length (4 bytes)
-                out += struct.pack(">BII", 1, match_offset, match_length)
-                pos += match_length
-            else:
-                # литерал: flag=0 + байт
-                out += struct.pack(">B", 0) + data[pos:pos + 1]
-                pos += 1
+        return min(pos, end)
 
-        return bytes(out)
+    def decompress_stream(self, src, dst):
+        """
+        Потоковое восстановление: сжатые данные читаются порциями, декодируются только
+        полные группы токенов, а в памяти остаются последние window_size байтов
+        выхода (из заголовка) — дальше ссылки не заходят.
+        """
+        header = src.read(self.HEADER.size)
+        if not header:
+            return
+        if header[0] < self.FORMAT_VERSION:
+            # Старый формат не предназначен для потока: разбираем целиком
+            dst.write(self._decompress_legacy(header + src.read()))
+            return
+        if header[0] != self.FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата LZSS: {header[0]}")
+        if len(header) < self.HEADER.size:
+            raise ValueError("Некорректные данные LZSS: обрезанный заголовок.")
 
-    def decompress(self, data: bytes) -> bytes:
+        _, min_match, offset_bytes, length_bytes, history = self.HEADER.unpack(header)
+        match_bytes = offset_bytes + length_bytes
+        # Полный размер группы: управляющий байт, литералы и ссылки
+        group_sizes = [9 + bin(flags).count("1") * (match_bytes - 1) for flags in range(256)]
+        pending = bytearray()
+        out = bytearray()
+        eof = False
+        while not eof:
+            chunk = src.read(self.STREAM_CHUNK_SIZE)
+            eof = not chunk
+            pending += chunk
+            if eof:
+                end = len(pending)
+            else:
+                end = 0
+                while end < len(pending) and end + group_sizes[pending[end]] <= len(pending):
+                    end += group_sizes[pending[end]]
+            written = len(out)
+            self._decode_groups(pending, 0, end, out, min_match, offset_bytes, length_bytes)
+            del pending[:end]
+            dst.write(out[written:])
+            if len(out) > history:
+                del out[:len(out) - history]
+
+    @staticmethod
+    def _decompress_legacy(data: bytes) -> bytes:
         """
+        Старый формат: токены с флагом в отдельном байте.
         - Если флаг равен 0, читается литерал (1 байт) и добавляется в выход.
-        - Если флаг равен 1, читаются offset (2 байта) и length (1 байт). Из уже восстановленных данных копируется
+        - Если флаг равен 1, читаются offset (4 байта) и length (4 байта). Из уже восстановленных данных копируется
         последовательность длиной length, начиная с позиции: len(output) - offset.
         """
-        if not data:
-            return b""
         pos, n = 0, len(data)
         out = bytearray()
 
@@ -73,8 +393,7 @@ class LZSSCompressor(Compressor):
             elif flag == 1:
                 offset, length = struct.unpack(">II", data[pos:pos + 8])
                 pos += 8
-                start = len(out) - offset
-                out.extend(out[start:start + length])
+                copy_match(out, offset, length)
             else:
                 raise ValueError(f"Unknown LZSS flag: {flag}")
 
@@ -1,51 +1,224 @@
 import struct
+from array import array
+
+import numpy as np
 
 from compressor.base import Compressor
 
+# Код сброса словаря; коды новых последовательностей начинаются с FIRST_CODE
+CLEAR_CODE = 256
+FIRST_CODE = 257
+MIN_BITS = 9
+
+
+def code_width(count: int, max_code: int) -> int:
+    """
+    Ширина кода с номером count после сброса словаря. Перед ним кодер успел добавить
+    count последовательностей, поэтому наибольший возможный код — min(FIRST_CODE + count, max_code) - 1.
+    Декодер вычисляет ту же ширину по числу прочитанных кодов.
+    """
+    return max(MIN_BITS, (min(FIRST_CODE + count, max_code) - 1).bit_length())
+
 
 class LZWCompressor(Compressor):
+    # Через сколько входных байтов проверяется степень сжатия заполненного словаря
+    CHECK_INTERVAL = 10000
+    # Сколько кодов распаковывается за раз при восстановлении
+    DECODE_BATCH = 1 << 16
+
+    def __init__(self, max_bits: int = 16, reset: bool = True):
+        """
+        :param max_bits: максимальная ширина кода; словарь ограничен 2^max_bits кодами
+        :param reset: сбрасывать заполненный словарь (код CLEAR), когда степень сжатия падает
+        """
+        if not MIN_BITS <= max_bits <= 24:
+            raise ValueError(f"Ширина кода LZW должна быть от {MIN_BITS} до 24 бит: {max_bits}")
+        self.max_bits = max_bits
+        self.reset = reset
+
     def compress(self, data: bytes) -> bytes:
         """
-        Изначально словарь содержит все возможные байты (0-255).
-        Выводится последовательность кодов, каждый из которых упаковывается в 4 байта (32 бита, big-endian).
+        Изначально словарь содержит все возможные байты (0-255), код 256 зарезервирован под CLEAR.
+        Коды пишутся старшими битами вперёд переменной ширины: от 9 бит до max_bits по мере роста словаря.
+        Заполненный словарь больше не растёт; если степень сжатия с последнего сброса
+        падает ниже лучшей, выводится CLEAR и словарь начинается заново.
+        Формат: [max_bits (1 байт)][исходная длина (4 байта)][упакованные коды].
         """
         if not data:
             return b""
 
-        # Инициализация словаря: ключ – байтовая последовательность, значение – её код.
-        dictionary = {bytes([i]): i for i in range(256)}
-        dict_size = 256
-
-        w = b""
-        result_codes = []
-
-        for byte in data:
-            c = bytes([byte])
-            wc = w + c
-            if wc in dictionary:
-                w = wc
-            else:
-                result_codes.append(dictionary[w])
-                # Добавляем новую последовательность wc в словарь
-                dictionary[wc] = dict_size
+        max_code = 1 << self.max_bits
+        out = bytearray(struct.pack(">BI", self.max_bits, len(data)))
+        acc = 0
+        nbits = 0
+
+        # Словарь — префиксное дерево: ключ (код префикса << 8) | байт, значение — код продолжения.
+        # Коды 0-255 (однобайтовые последовательности) в нём не хранятся.
+        trie = {}
+        dict_size = FIRST_CODE
+        count = 0
+        # Статистика для решения о сбросе: входные байты и выходные биты с последнего сброса
+        bytes_in = 1
+        bits_out = 0
+        best_ratio = 0.0
+        next_check = self.CHECK_INTERVAL
+
+        symbols = iter(data)
+        w = next(symbols)
+        for byte in symbols:
+            bytes_in += 1
+            child = trie.get((w << 8) | byte)
+            if child is not None:
+                w = child
+                continue
+
+            width = code_width(count, max_code)
+            acc = (acc << width) | w
+            nbits += width
+            bits_out += width
+            count += 1
+            while nbits >= 8:
+                nbits -= 8
+                out.append((acc >> nbits) & 0xFF)
+            acc &= (1 << nbits) - 1
+
+            if dict_size < max_code:
+                # Добавляем продолжение w байтом byte в словарь
+                trie[(w << 8) | byte] = dict_size
                 dict_size += 1
-                w = c
-
-        if w:
-            result_codes.append(dictionary[w])
-
-        # Упаковка кодов в байты (каждый код – 4 байта, big-endian)
-        compressed_data = bytearray()
-        for code in result_codes:
-            compressed_data += struct.pack(">I", code)
-
-        return bytes(compressed_data)
+            elif self.reset and bytes_in >= next_check:
+                next_check = bytes_in + self.CHECK_INTERVAL
+                ratio = bytes_in / bits_out
+                if ratio >= best_ratio:
+                    best_ratio = ratio
+                else:
+                    width = code_width(count, max_code)
+                    acc = (acc << width) | CLEAR_CODE
+                    nbits += width
+                    while nbits >= 8:
+                        nbits -= 8
+                        out.append((acc >> nbits) & 0xFF)
+                    acc &= (1 << nbits) - 1
+                    trie = {}
+                    dict_size = FIRST_CODE
+                    count = 0
+                    bytes_in = bits_out = 0
+                    best_ratio = 0.0
+                    next_check = self.CHECK_INTERVAL
+            w = byte
+
+        width = code_width(count, max_code)
+        acc = (acc << width) | w
+        nbits += width
+        while nbits >= 8:
+            nbits -= 8
+            out.append((acc >> nbits) & 0xFF)
+        if nbits:
+            # Последний байт дополняется нулевыми битами справа
+            out.append((acc << (8 - nbits)) & 0xFF)
+
+        return bytes(out)
+
+    @staticmethod
+    def _read_codes(data: bytes, bit_pos: int, width: int, count: int) -> list:
+        """
+        Распаковывает count кодов одной ширины, начиная с бита bit_pos, одной операцией NumPy.
+        """
+        first = bit_pos // 8
+        last = (bit_pos + count * width + 7) // 8
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=last - first, offset=first))
+        start = bit_pos % 8
+        bits = bits[start:start + count * width].reshape(count, width)
+        weights = np.left_shift(1, np.arange(width - 1, -1, -1, dtype=np.int64))
+        return (bits @ weights).tolist()
 
     def decompress(self, data: bytes) -> bytes:
-        
+        """
+        Коды распаковываются пачками одинаковой ширины (code_width по числу кодов после сброса).
+        Словарь хранит не строки, а место первого появления фразы в выходе: новая фраза w + entry[0]
+        лежит там же, где w, и на байт длиннее. Поэтому каждая фраза копируется одним срезом
+        в заранее выделенный по исходной длине буфер. Потоки старого формата (коды по 4 байта)
+        начинаются с нулевого байта и разбираются _decompress_legacy.
+        """
         if not data:
             return b""
+        if data[0] == 0:
+            return self._decompress_legacy(data)
+
+        max_bits, length = struct.unpack(">BI", data[:5])
+        max_code = 1 << max_bits
+        total_bits = 8 * len(data)
+        bit_pos = 40
+        result = bytearray(length)
+        pos = 0
+
+        # Фраза с кодом k >= FIRST_CODE — result[offsets[k]:offsets[k] + lengths[k]].
+        # Каждый код выводит хотя бы байт, поэтому кодов не больше, чем FIRST_CODE + length
+        table_size = min(max_code, FIRST_CODE + length)
+        offsets = array("q", [0]) * table_size
+        lengths = array("q", [0]) * table_size
+        dict_size = FIRST_CODE
+        count = 0
+        prev_pos = -1
+        prev_len = 0
+
+        while pos < length:
+            width = code_width(count, max_code)
+            batch = (total_bits - bit_pos) // width
+            if FIRST_CODE + count < max_code:
+                # Коды этой ширины закончатся, когда словарь дорастёт до 2^width
+                batch = min(batch, (1 << width) - FIRST_CODE + 1 - count)
+            batch = min(batch, self.DECODE_BATCH)
+            if batch <= 0:
+                raise ValueError("Некорректные данные LZW: поток кодов обрезан.")
+
+            for k in self._read_codes(data, bit_pos, width, batch):
+                bit_pos += width
+                if k == CLEAR_CODE:
+                    dict_size = FIRST_CODE
+                    count = 0
+                    prev_pos = -1
+                    break
+                count += 1
+
+                if k < 256:
+                    size = 1
+                    result[pos] = k
+                elif k < dict_size:
+                    size = lengths[k]
+                    if pos + size > length:
+                        raise ValueError("Некорректные данные LZW: выход длиннее заголовка.")
+                    start = offsets[k]
+                    result[pos:pos + size] = result[start:start + size]
+                elif k == dict_size and prev_pos >= 0:
+                    # Фраза w + w[0], где w — предыдущая фраза
+                    size = prev_len + 1
+                    if pos + size > length:
+                        raise ValueError("Некорректные данные LZW: выход длиннее заголовка.")
+                    result[pos:pos + prev_len] = result[prev_pos:prev_pos + prev_len]
+                    result[pos + prev_len] = result[prev_pos]
+                else:
+                    raise ValueError("Некорректный код LZW: {}".format(k))
+
+                # Добавляем новую последовательность в словарь
+                if prev_pos >= 0 and dict_size < max_code:
+                    offsets[dict_size] = prev_pos
+                    lengths[dict_size] = prev_len + 1
+                    dict_size += 1
+
+                prev_pos = pos
+                prev_len = size
+                pos += size
+                if pos >= length:
+                    break
+
+        return bytes(result)
 
+    @staticmethod
+    def _decompress_legacy(data: bytes) -> bytes:
+        """
+        Старый формат: каждый код занимает 4 байта (big-endian), словарь не ограничен.
+        """
         # Извлечение кодов: каждый код занимает 4 байта
         codes = []
         for i in range(0, len(data), 4):
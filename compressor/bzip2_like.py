@@ -0,0 +1,122 @@
+import struct
+from array import array
+
+import numpy as np
+
+from compressor.base import Compressor
+from compressor.bwt import BWTCompressor
+from compressor.huffman import canonical_codes, code_lengths, decode, encode_array, read_code_lengths, write_code_lengths
+from compressor.rle import RUNB, zero_run_digits
+
+# Алфавит блока: RUNA, RUNB и индексы MTF 1..255, сдвинутые на единицу
+ALPHABET_SIZE = 257
+
+
+class Bzip2LikeCompressor(Compressor):
+    def __init__(self, block_size: int = 900_000, sa_engine: str = "numpy"):
+        """
+        Слитный конвейер BWT -> MTF -> кодирование серий нулей (RUNA/RUNB) -> Хаффман,
+        выполняемый поблочно без промежуточных bytes между стадиями.
+        :param block_size: размер блока BWT (None — весь вход одним блоком)
+        :param sa_engine: алгоритм суффиксного массива (см. BWTCompressor)
+        """
+        self.block_size = block_size
+        self.sa_engine = sa_engine
+
+    @staticmethod
+    def _mtf_zero_run(last_column: bytes) -> tuple[array, dict]:
+        """
+        За один проход выполняет MTF, заменяет серии нулевых индексов цифрами RUNA/RUNB
+        и считает частоты получившихся символов.
+        """
+        symbols = array("H")
+        freq = [0] * ALPHABET_SIZE
+        alphabet = bytearray(range(256))
+        front = 0
+        zeros = 0
+
+        for byte in last_column:
+            if byte == front:
+                zeros += 1
+                continue
+            if zeros:
+                for digit in zero_run_digits(zeros):
+                    symbols.append(digit)
+                    freq[digit] += 1
+                zeros = 0
+            index = alphabet.index(byte)
+            del alphabet[index]
+            alphabet.insert(0, byte)
+            front = byte
+            symbols.append(index + 1)
+            freq[index + 1] += 1
+
+        if zeros:
+            for digit in zero_run_digits(zeros):
+                symbols.append(digit)
+                freq[digit] += 1
+
+        return symbols, {symbol: f for symbol, f in enumerate(freq) if f}
+
+    @staticmethod
+    def _inverse_mtf_zero_run(symbols, length: int) -> bytes:
+        out = bytearray(length)
+        alphabet = bytearray(range(256))
+        pos = 0
+        run = 0
+        weight = 1
+
+        for symbol in symbols:
+            if symbol <= RUNB:
+                run += weight << symbol
+                weight <<= 1
+                continue
+            if run:
+                out[pos:pos + run] = alphabet[:1] * run
+                pos += run
+                run = 0
+                weight = 1
+            front = alphabet.pop(symbol - 1)
+            alphabet.insert(0, front)
+            out[pos] = front
+            pos += 1
+
+        if run:
+            out[pos:pos + run] = alphabet[:1] * run
+            pos += run
+        if pos != length:
+            raise ValueError("Некорректные данные: длина блока не совпадает с заголовком.")
+        return bytes(out)
+
+    def _encode_block(self, block: bytes) -> bytes:
+        last_column, idx = BWTCompressor.bwt_transform(block, self.sa_engine)
+        symbols, freq = self._mtf_zero_run(last_column)
+        lengths = code_lengths(freq)
+        payload, _ = encode_array(np.frombuffer(symbols, dtype=np.uint16), canonical_codes(lengths))
+        return (struct.pack(">IIII", len(block), idx, len(symbols), len(payload))
+                + write_code_lengths(lengths) + payload)
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Формат блока: [длина блока][original_index][число символов][длина полезной нагрузки]
+        (по 4 байта), затем длины кодов Хаффмана и закодированный поток символов.
+        """
+        if not data:
+            return b""
+        out = bytearray()
+        size = self.block_size or len(data)
+        for pos in range(0, len(data), size):
+            out += self._encode_block(data[pos:pos + size])
+        return bytes(out)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = bytearray()
+        pos = 0
+        while pos < len(data):
+            length, idx, count, payload_length = struct.unpack(">IIII", data[pos:pos + 16])
+            lengths, pos = read_code_lengths(data, pos + 16)
+            symbols = decode(data[pos:pos + payload_length], lengths, count)
+            pos += payload_length
+            last_column = self._inverse_mtf_zero_run(symbols, length)
+            out += BWTCompressor.bwt_inverse(last_column, idx)
+        return bytes(out)
@@ -1,19 +1,45 @@
+import io
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
 from typing import List
 
 from compressor.base import Compressor
 
 
 class CombinedCompressor(Compressor):
-    def __init__(self, compressors: List[Compressor]):
+    EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+    # Сколько блоков одновременно находится в работе у каждой стадии
+    PIPELINE_DEPTH = 2
+    # Размер блока compress_stream, если block_size не задан
+    STREAM_BLOCK_SIZE = 1 << 20
+
+    def __init__(self, compressors: List[Compressor], block_size: int = None, executor: str = None):
         """
         :param compressors: список объектов, реализующих интерфейс Compressor.
+        :param block_size: размер блока потокового режима; None — весь вход проходит стадии целиком.
+            Если задан, каждый блок независимо проходит все стадии и записывается
+            с 4-байтовой длиной, так что формат отличается от режима без блоков.
+        :param executor: где выполнять стадии потокового режима: None — в текущем потоке,
+            "thread" — каждая стадия в своём потоке, "process" — каждая стадия в своём процессе.
+            Стадии обрабатывают разные блоки одновременно (конвейер).
         """
+        if executor is not None and executor not in self.EXECUTORS:
+            raise ValueError(f"Неизвестный исполнитель конвейера: {executor}")
         self.compressors = compressors
+        self.block_size = block_size
+        self.executor = executor
 
     def compress(self, data: bytes) -> bytes:
         """
         Последовательно применяет метод compress() для каждого алгоритма.
+        При заданном block_size данные сжимаются поблочно через compress_stream.
         """
+        if self.block_size:
+            dst = io.BytesIO()
+            self.compress_stream(io.BytesIO(data), dst)
+            return dst.getvalue()
         result = data
         for compressor in self.compressors:
             result = compressor.compress(result)
@@ -23,7 +49,74 @@ class CombinedCompressor(Compressor):
         """
         Последовательно применяет метод decompress() для каждого алгоритма в обратном порядке.
         """
+        if self.block_size:
+            dst = io.BytesIO()
+            self.decompress_stream(io.BytesIO(data), dst)
+            return dst.getvalue()
         result = data
         for compressor in reversed(self.compressors):
             result = compressor.decompress(result)
         return result
+
+    def _pipeline(self, funcs, chunks):
+        """
+        Связывает стадии генераторами: каждая стадия получает блоки от предыдущей
+        по мере готовности. С исполнителем у каждой стадии свой пул из одного работника
+        и не больше PIPELINE_DEPTH блоков в работе, поэтому стадии обрабатывают
+        разные блоки одновременно, а память ограничена несколькими блоками на стадию.
+        """
+        if self.executor is None:
+            for func in funcs:
+                chunks = map(func, chunks)
+            yield from chunks
+            return
+
+        with ExitStack() as stack:
+            for func in funcs:
+                pool = stack.enter_context(self.EXECUTORS[self.executor](max_workers=1))
+                chunks = self._stage(pool, func, chunks)
+            yield from chunks
+
+    def _stage(self, pool, func, chunks):
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= self.PIPELINE_DEPTH:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def compress_stream(self, src, dst):
+        """
+        Потоковое сжатие: блоки по block_size байтов читаются из src, проходят все стадии
+        и записываются в dst как [длина (4 байта)][сжатый блок].
+        """
+        size = self.block_size or self.STREAM_BLOCK_SIZE
+        blocks = iter(lambda: src.read(size), b"")
+        funcs = [compressor.compress for compressor in self.compressors]
+        for block in self._pipeline(funcs, blocks):
+            dst.write(struct.pack(">I", len(block)))
+            dst.write(block)
+
+    def decompress_stream(self, src, dst):
+        """
+        Потоковое восстановление: блоки читаются из src по 4-байтовым длинам
+        и проходят стадии в обратном порядке.
+        """
+        funcs = [compressor.decompress for compressor in reversed(self.compressors)]
+        for block in self._pipeline(funcs, self._read_frames(src)):
+            dst.write(block)
+
+    @staticmethod
+    def _read_frames(src):
+        while True:
+            header = src.read(4)
+            if not header:
+                return
+            if len(header) < 4:
+                raise ValueError("Некорректные данные: обрезанный заголовок блока.")
+            (length,) = struct.unpack(">I", header)
+            block = src.read(length)
+            if len(block) != length:
+                raise ValueError("Некорректные данные: блок обрезан.")
+            yield block
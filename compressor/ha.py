@@ -1,128 +1,131 @@
 import heapq
 import struct
 
+import numpy as np
+
 from compressor.base import Compressor
+from compressor.huffman import (GROUP_SIZE, canonical_codes, code_lengths, decode, decode_multi_table, encode_array,
+                                encode_multi_table, read_code_lengths, write_code_lengths)
 
 
 class HACompressor(Compressor):
-    class Node:
-       
-        def __init__(self, freq, symbol=None, left=None, right=None):
-            self.freq = freq
-            self.symbol = symbol
-            self.left = left
-            self.right = right
+    # Первый байт потока — формат. Старый формат начинается со старшего байта
+    # числа символов (0 или 1), поэтому маркеры выбраны вне этого диапазона
+    MULTI_TABLE_MARKER = 0x80
+    SINGLE_TABLE_MARKER = 0x81
 
-        def __lt__(self, other):
-            return self.freq < other.freq
+    def __init__(self, tables: int = 1, group_size: int = GROUP_SIZE, iterations: int = 4):
+        """
+        :param tables: число таблиц Хаффмана (1 — одна статическая таблица на весь вход).
+            При tables > 1 вход делится на группы по group_size символов,
+            и каждая группа кодируется самой выгодной для неё таблицей.
+        :param group_size: размер группы символов с общей таблицей
+        :param iterations: число итераций уточнения таблиц и назначения групп
+        """
+        self.tables = tables
+        self.group_size = group_size
+        self.iterations = iterations
 
     def compress(self, data: bytes) -> bytes:
         """
         Шаги:
           1. Подсчёт частот символов.
-          2. Построение дерева Хаффмана.
-          3. Формирование таблицы кодов.
+          2. Вычисление длин кодов Хаффмана (не длиннее 15 бит).
+          3. Формирование канонической таблицы кодов.
           4. Кодирование данных с помощью полученной таблицы.
-          5. Сохранение заголовка с информацией о частотах для декомпрессии.
+          5. Сохранение заголовка с длинами кодов для декомпрессии.
         """
         if not data:
             return b""
 
-        freq = {}
-        for byte in data:
-            freq[byte] = freq.get(byte, 0) + 1
-
-        root = self._build_ha_tree(freq)
-
-        codes = {}
-
-        def build_codes(node, code=""):
-            if node is None:
-                return
-            if node.symbol is not None:
-                codes[node.symbol] = code or "0"  # для случая одного уникального символа
-            build_codes(node.left, code + "0")
-            build_codes(node.right, code + "1")
-
-        build_codes(root)
+        symbols = np.frombuffer(data, dtype=np.uint8)
+        if self.tables > 1:
+            return (bytes([self.MULTI_TABLE_MARKER])
+                    + encode_multi_table(symbols, self.tables, self.group_size, self.iterations))
 
-        encoded_bits = "".join(codes[byte] for byte in data)
+        # bincount приводит вход к intp, поэтому считаем частоты порциями
+        counts = np.zeros(256, dtype=np.int64)
+        for start in range(0, len(symbols), 1 << 20):
+            counts += np.bincount(symbols[start:start + (1 << 20)], minlength=256)
+        freq = {symbol: int(counts[symbol]) for symbol in np.flatnonzero(counts).tolist()}
 
-        # Добавляем паддинг, чтобы длина была кратна 8
-        pad_len = (8 - len(encoded_bits) % 8) % 8
-        encoded_bits += "0" * pad_len
+        lengths = code_lengths(freq)
+        # Коды пакуются в байты напрямую, без промежуточной строки из '0' и '1'
+        compressed_data, pad_len = encode_array(symbols, canonical_codes(lengths))
 
-        # Упаковка битовой строки в байты
-        compressed_data = bytearray()
-        for i in range(0, len(encoded_bits), 8):
-            byte = int(encoded_bits[i:i + 8], 2)
-            compressed_data.append(byte)
-
-        # Формирование заголовка:
-        # Сохраним число уникальных символов (2 байта),
-        # для каждого символа сохраним: 1 байт (symbol) + 4 байта (частота)
-        header = bytearray()
-        header += struct.pack(">H", len(freq))  # число уникальных символов (big-endian)
-        for symbol, f in freq.items():
-            header += struct.pack(">BI", symbol, f)
-
-        header += struct.pack("B", pad_len)
-
-        return bytes(header) + bytes(compressed_data)
+        # Формирование заголовка: маркер формата и длина паддинга (по 1 байту) и длины
+        # канонических кодов (по полубайту на символ). Сами коды однозначно восстанавливаются по длинам.
+        return struct.pack("BB", self.SINGLE_TABLE_MARKER, pad_len) + write_code_lengths(lengths) + compressed_data
 
     def decompress(self, data: bytes) -> bytes:
         """
         Шаги:
-          1. Считывание заголовка и восстановление частотной таблицы.
-          2. Построение дерева Хаффмана.
-          3. Декодирование битового потока.
+          1. Считывание заголовка с длинами канонических кодов.
+          2. Табличное декодирование битового потока.
+        Потоки старого формата (таблица частот) разбираются _decompress_legacy.
         """
         if not data:
             return b""
 
-        pos = 0
-        num_symbols = struct.unpack(">H", data[pos:pos + 2])[0]
-        pos += 2
-
-        freq = {}
-        for _ in range(num_symbols):
-            symbol, f = struct.unpack(">BI", data[pos:pos + 5])
-            freq[symbol] = f
-            pos += 5
-
-        pad_len = struct.unpack("B", data[pos:pos + 1])[0]
-        pos += 1
-
-        # Остальные данные – это сжатый поток
-        compressed_bits = ""
-        for byte in data[pos:]:
-            compressed_bits += f"{byte:08b}"
-        # Удаляем паддинг в конце
-        if pad_len:
-            compressed_bits = compressed_bits[:-pad_len]
+        if data[0] == self.MULTI_TABLE_MARKER:
+            return bytes(decode_multi_table(data, 1))
+        if data[0] < 2:
+            return self._decompress_legacy(data)
+        if data[0] != self.SINGLE_TABLE_MARKER or len(data) < 2:
+            raise ValueError(f"Неподдерживаемый формат данных HA: {data[0]}")
+
+        pad_len = data[1]
+        if pad_len > 7:
+            raise ValueError(f"Некорректные данные HA: длина паддинга {pad_len}")
+        lengths, pos = read_code_lengths(data, 2)
+        return bytes(decode(data[pos:], lengths, pad_len=pad_len))
+
+    class _LegacyNode:
+        # Узел дерева старого формата: в куче сравнивается только по частоте,
+        # как при сжатии, чтобы дерево (и коды) совпали с кодером
+        def __init__(self, freq, symbol=None, left=None, right=None):
+            self.freq = freq
+            self.symbol = symbol
+            self.left = left
+            self.right = right
 
-        root = self._build_ha_tree(freq)
+        def __lt__(self, other):
+            return self.freq < other.freq
 
-        decoded_bytes = bytearray()
-        node = root
-        for bit in compressed_bits:
-            if bit == "0":
-                node = node.left
-            else:
-                node = node.right
-            if node.symbol is not None:  
-                decoded_bytes.append(node.symbol)
-                node = root
-
-        return bytes(decoded_bytes)
-
-    def _build_ha_tree(self, freq):
+    @classmethod
+    def _decompress_legacy(cls, data: bytes) -> bytes:
+        """
+        Старый формат: [число символов (2 байта)], для каждого символа [символ (1 байт)][частота (4 байта)],
+        [длина паддинга (1 байт)], затем коды дерева Хаффмана, построенного по частотам.
+        """
+        num_symbols = struct.unpack(">H", data[:2])[0] if len(data) >= 2 else 0
+        pos = 2 + 5 * num_symbols
+        if not num_symbols or len(data) < pos + 1:
+            raise ValueError("Некорректные данные HA: обрезанный заголовок старого формата.")
         heap = []
-        for symbol, f in freq.items():
-            heapq.heappush(heap, self.Node(f, symbol))
+        for symbol, f in struct.iter_unpack(">BI", data[2:pos]):
+            heapq.heappush(heap, cls._LegacyNode(f, symbol))
+        pad_len = data[pos]
+        pos += 1
         while len(heap) > 1:
             left = heapq.heappop(heap)
             right = heapq.heappop(heap)
-            merged = self.Node(left.freq + right.freq, None, left, right)
-            heapq.heappush(heap, merged)
-        return heap[0]
+            heapq.heappush(heap, cls._LegacyNode(left.freq + right.freq, None, left, right))
+        root = heap[0]
+
+        out = bytearray()
+        bits_left = 8 * (len(data) - pos) - pad_len
+        node = root
+        for byte in data[pos:]:
+            for shift in range(7, -1, -1):
+                if not bits_left:
+                    break
+                bits_left -= 1
+                node = node.right if byte >> shift & 1 else node.left
+                if node is None:
+                    # Единственный символ: дерево из одного листа, каждый бит — этот символ
+                    node = root
+                if node.symbol is not None:
+                    out.append(node.symbol)
+                    node = root
+        return bytes(out)
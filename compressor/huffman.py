@@ -0,0 +1,483 @@
+import heapq
+import struct
+
+import numpy as np
+
+# Максимальная длина кода: длины помещаются в полубайт заголовка
+MAX_CODE_LENGTH = 15
+# Число битов, разрешаемых одним обращением к таблице декодера
+LOOKUP_BITS = 12
+# Размер группы символов, для которой выбирается одна из таблиц в многотабличном режиме
+GROUP_SIZE = 50
+# Число символов, упаковываемых за один шаг векторного кодировщика
+PACK_CHUNK = 1 << 15
+
+
+def code_lengths(freq: dict, max_length: int = MAX_CODE_LENGTH) -> dict:
+    """
+    Длины кодов Хаффмана по таблице частот.
+    :param freq: словарь символ -> частота (символы — неотрицательные целые)
+    :param max_length: ограничение длины кода; если код Хаффмана его превышает,
+        длины строятся алгоритмом package-merge (оптимальный код с ограничением)
+    :return: словарь символ -> длина кода в битах
+    """
+    if len(freq) == 1:
+        # для случая одного уникального символа
+        return {symbol: 1 for symbol in freq}
+
+    lengths = {symbol: 0 for symbol in freq}
+    # Элемент кучи: (частота, порядковый номер для устойчивости, символы поддерева)
+    heap = [(f, i, [symbol]) for i, (symbol, f) in enumerate(sorted(freq.items()))]
+    heapq.heapify(heap)
+    counter = len(heap)
+    while len(heap) > 1:
+        f1, _, left = heapq.heappop(heap)
+        f2, _, right = heapq.heappop(heap)
+        for symbol in left:
+            lengths[symbol] += 1
+        for symbol in right:
+            lengths[symbol] += 1
+        heapq.heappush(heap, (f1 + f2, counter, left + right))
+        counter += 1
+
+    if max_length and max(lengths.values()) > max_length:
+        return _package_merge(freq, max_length)
+    return lengths
+
+
+def _package_merge(freq: dict, max_length: int) -> dict:
+    """
+    Алгоритм package-merge: длина кода символа равна числу вхождений его листа
+    в 2n - 2 самых лёгких элементов списка после max_length раундов упаковки.
+    """
+    if len(freq) > 1 << max_length:
+        raise ValueError(f"Алфавит из {len(freq)} символов не кодируется кодами длиной до {max_length} бит.")
+    leaves = sorted((f, (symbol,)) for symbol, f in freq.items())
+    items = leaves
+    for _ in range(max_length - 1):
+        packages = [(items[i][0] + items[i + 1][0], items[i][1] + items[i + 1][1])
+                    for i in range(0, len(items) - 1, 2)]
+        items = sorted(leaves + packages, key=lambda item: item[0])
+
+    lengths = {symbol: 0 for symbol in freq}
+    for _, symbols in items[:2 * len(freq) - 2]:
+        for symbol in symbols:
+            lengths[symbol] += 1
+    return lengths
+
+
+def canonical_codes(lengths: dict) -> dict:
+    """
+    Канонические коды: символы упорядочены по (длина, символ), коды одной длины идут подряд.
+    :return: словарь символ -> (код, длина)
+    """
+    codes = {}
+    code = 0
+    prev_length = 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        if not length:
+            continue
+        code <<= length - prev_length
+        codes[symbol] = (code, length)
+        code += 1
+        prev_length = length
+    return codes
+
+
+def write_code_lengths(lengths: dict) -> bytes:
+    """
+    Заголовок с длинами канонических кодов: [число символов алфавита (2 байта)],
+    затем по полубайту на символ — его длина (1..15). Серии неиспользуемых
+    символов (длина 0) кодируются парой полубайтов [0][длина серии - 1].
+    """
+    count = max(lengths) + 1 if lengths else 0
+    nibbles = bytearray()
+    symbol = 0
+    while symbol < count:
+        length = lengths.get(symbol, 0)
+        if length:
+            nibbles.append(length)
+            symbol += 1
+            continue
+        run = 1
+        while run < 16 and lengths.get(symbol + run, 0) == 0:
+            run += 1
+        nibbles += bytes((0, run - 1))
+        symbol += run
+    if len(nibbles) % 2:
+        nibbles.append(0)
+    packed = bytes((nibbles[i] << 4) | nibbles[i + 1] for i in range(0, len(nibbles), 2))
+    return count.to_bytes(2, "big") + packed
+
+
+def read_code_lengths(data: bytes, pos: int) -> tuple[dict, int]:
+    """
+    Разбирает заголовок write_code_lengths.
+    :return: (словарь символ -> длина, позиция после заголовка)
+    """
+    if pos + 2 > len(data):
+        raise ValueError("Некорректные данные: обрезанная таблица длин кодов.")
+    count = int.from_bytes(data[pos:pos + 2], "big")
+    pos += 2
+    lengths = {}
+    symbol = 0
+    nibble = 0  # номер следующего полубайта относительно pos
+
+    def next_nibble():
+        nonlocal nibble
+        if pos + nibble // 2 >= len(data):
+            raise ValueError("Некорректные данные: обрезанная таблица длин кодов.")
+        byte = data[pos + nibble // 2]
+        value = byte >> 4 if nibble % 2 == 0 else byte & 0x0F
+        nibble += 1
+        return value
+
+    while symbol < count:
+        length = next_nibble()
+        if length:
+            lengths[symbol] = length
+            symbol += 1
+        else:
+            symbol += next_nibble() + 1
+    return lengths, pos + (nibble + 1) // 2
+
+
+def encode(symbols, codes: dict) -> tuple[bytes, int]:
+    """
+    Кодирует последовательность символов, накапливая коды в целочисленном битовом буфере.
+    :return: (упакованные байты, число битов дополнения в последнем байте)
+    """
+    out = bytearray()
+    acc = 0
+    nbits = 0
+    for symbol in symbols:
+        code, length = codes[symbol]
+        acc = (acc << length) | code
+        nbits += length
+        if nbits >= 32:
+            nbits -= 32
+            out += (acc >> nbits).to_bytes(4, "big")
+            acc &= (1 << nbits) - 1
+    pad_len = (8 - nbits % 8) % 8
+    if nbits:
+        out += (acc << pad_len).to_bytes((nbits + pad_len) // 8, "big")
+    return bytes(out), pad_len
+
+
+def encode_array(symbols: np.ndarray, codes: dict) -> tuple[bytes, int]:
+    """
+    Векторное кодирование: коды и длины берутся из массивов-таблиц по индексу символа,
+    каждый код раскладывается на биты, лишние старшие позиции отбрасываются маской,
+    а биты упаковываются через np.packbits. Данные обрабатываются порциями по
+    PACK_CHUNK символов, незаполненный хвост байта переносится в следующую порцию.
+    :param symbols: массив неотрицательных целых символов
+    :return: (упакованные байты, число битов дополнения в последнем байте)
+    """
+    size = max(codes) + 1
+    max_length = max(length for _, length in codes.values())
+    dtype = np.uint32 if max_length <= 32 else np.uint64
+    code_table = np.zeros(size, dtype=dtype)
+    length_table = np.zeros(size, dtype=np.uint8)
+    for symbol, (code, length) in codes.items():
+        code_table[symbol] = code
+        length_table[symbol] = length
+    positions = np.arange(max_length - 1, -1, -1, dtype=dtype)
+
+    out = bytearray()
+    carry = np.empty(0, dtype=np.uint8)
+    for start in range(0, len(symbols), PACK_CHUNK):
+        chunk = symbols[start:start + PACK_CHUNK]
+        chunk_codes = code_table[chunk]
+        chunk_lengths = length_table[chunk]
+        # Биты кода, выровненного по правому краю: столбец j — бит веса 2^(max_length-1-j)
+        bits = ((chunk_codes[:, None] >> positions) & 1).astype(np.uint8)
+        used = positions < chunk_lengths[:, None].astype(dtype)
+        stream = np.concatenate((carry, bits[used]))
+        whole = len(stream) - len(stream) % 8
+        out += np.packbits(stream[:whole]).tobytes()
+        carry = stream[whole:]
+
+    pad_len = (8 - len(carry)) % 8
+    if len(carry):
+        out += np.packbits(carry).tobytes()
+    return bytes(out), pad_len
+
+
+class DecodingTable:
+    """
+    Таблица табличного декодера для одного канонического кода.
+    Для каждого значения следующих table_bits битов хранит кортеж всех символов,
+    коды которых целиком в них помещаются, и суммарное число их битов
+    (0 — первый код длиннее таблицы, он дочитывается каноническим способом).
+    """
+
+    def __init__(self, lengths: dict, table_bits: int = LOOKUP_BITS):
+        self.codes = canonical_codes(lengths)
+        self.max_length = max(lengths.values())
+        self.table_bits = min(self.max_length, table_bits)
+        self.mask = (1 << self.table_bits) - 1
+        self._build_lookup()
+
+        # Канонические параметры для длинных кодов: первый код и символы каждой длины
+        self.first_code = [0] * (self.max_length + 1)
+        self.by_length = [[] for _ in range(self.max_length + 1)]
+        for symbol in sorted(self.codes, key=lambda symbol: (self.codes[symbol][1], symbol)):
+            code, length = self.codes[symbol]
+            if not self.by_length[length]:
+                self.first_code[length] = code
+            self.by_length[length].append(symbol)
+
+    def _build_lookup(self):
+        size = 1 << self.table_bits
+        first_symbol = [None] * size
+        first_length = [0] * size
+        for symbol, (code, length) in self.codes.items():
+            if length <= self.table_bits:
+                shift = self.table_bits - length
+                start = code << shift
+                for entry in range(start, start + (1 << shift)):
+                    first_symbol[entry] = symbol
+                    first_length[entry] = length
+
+        self.symbols = [()] * size
+        self.bits_used = [0] * size
+        for entry in range(size):
+            symbols = []
+            used = 0
+            while True:
+                # Следующий код начинается через used битов; недостающие биты не известны
+                peek = (entry << used) & self.mask
+                length = first_length[peek]
+                if not length or used + length > self.table_bits:
+                    break
+                symbols.append(first_symbol[peek])
+                used += length
+            self.symbols[entry] = tuple(symbols)
+            self.bits_used[entry] = used
+
+    def read_long_code(self, acc: int, nbits: int) -> tuple[int, int]:
+        """
+        Канонически дочитывает код длиннее таблицы из старших битов буфера acc.
+        :return: (символ, длина кода)
+        """
+        length = self.table_bits
+        while True:
+            length += 1
+            code = (acc >> (nbits - length)) & ((1 << length) - 1)
+            offset = code - self.first_code[length]
+            if 0 <= offset < len(self.by_length[length]):
+                return self.by_length[length][offset], length
+
+
+def decode(data: bytes, lengths: dict, count: int = None, pad_len: int = 0) -> list[int]:
+    """
+    Табличный декодер канонического кода Хаффмана.
+    Биты берутся из целочисленного буфера; одно обращение к таблице по следующим
+    8..LOOKUP_BITS битам потока выдаёт сразу все символы, чьи коды в них помещаются.
+    Коды длиннее таблицы дочитываются каноническим способом (по первому коду каждой длины).
+    :param count: число символов для декодирования; если None — декодируется весь
+        поток, кроме последних pad_len битов дополнения
+    """
+    if not lengths:
+        return []
+    # Для коротких потоков таблица меньше, чтобы её построение не стоило дороже декодирования
+    table = DecodingTable(lengths, min(LOOKUP_BITS, max(8, len(data).bit_length())))
+    max_length = table.max_length
+    table_bits = table.table_bits
+    table_mask = table.mask
+    table_symbols = table.symbols
+    table_bits_used = table.bits_used
+
+    result = []
+    acc = 0
+    nbits = 0  # число битов в буфере acc
+    pos = 0
+
+    # Быстрый цикл: в буфер подкачиваются только байты, которые заведомо целиком
+    # принадлежат потоку (последний байт может содержать дополнение), поэтому
+    # записи таблицы применяются целиком без проверки границ на каждом символе
+    safe_end = len(data) - 1
+    while True:
+        if nbits < max_length:
+            if pos + 8 > safe_end:
+                break
+            acc = ((acc & ((1 << nbits) - 1)) << 64) | int.from_bytes(data[pos:pos + 8], "big")
+            pos += 8
+            nbits += 64
+            continue
+        peek = (acc >> (nbits - table_bits)) & table_mask
+        used = table_bits_used[peek]
+        if used:
+            result += table_symbols[peek]
+        else:
+            symbol, used = table.read_long_code(acc, nbits)
+            result.append(symbol)
+        nbits -= used
+
+    # Хвост потока: по одному символу с точной проверкой границ;
+    # за концом данных буфер дополняется нулями
+    total_bits = len(data) * 8 - pad_len
+    consumed = pos * 8 - nbits
+    if count is None:
+        count = total_bits  # символов не больше, чем битов
+    while consumed < total_bits and len(result) < count:
+        while nbits < max_length:
+            chunk = data[pos:pos + 8]
+            pos += 8
+            acc = ((acc & ((1 << nbits) - 1)) << 64) | (int.from_bytes(chunk, "big") << (8 * (8 - len(chunk))))
+            nbits += 64
+        peek = (acc >> (nbits - table_bits)) & table_mask
+        if table_bits_used[peek]:
+            symbol = table_symbols[peek][0]
+            used = table.codes[symbol][1]
+        else:
+            symbol, used = table.read_long_code(acc, nbits)
+        result.append(symbol)
+        nbits -= used
+        consumed += used
+
+    return result
+
+
+def encode_multi_table(symbols: np.ndarray, tables: int, group_size: int = GROUP_SIZE,
+                       iterations: int = 4) -> bytes:
+    """
+    Многотабличное кодирование (как в bzip2): поток делится на группы по group_size
+    символов, строится несколько таблиц Хаффмана, и каждая группа кодируется самой
+    дешёвой для неё таблицей. Назначение групп уточняется iterations раз: таблицы
+    перестраиваются по частотам своих групп, затем группы перераспределяются.
+    Формат: [число символов (4 байта)][размер группы (2 байта)][число таблиц (1 байт)],
+    длины кодов каждой таблицы, [длина селекторов (4 байта)], селекторы
+    (MTF по номерам таблиц + унарный код) и закодированные данные.
+    """
+    n = len(symbols)
+    symbols = symbols.astype(np.int64)
+    alphabet = int(symbols.max()) + 1
+    groups = -(-n // group_size)
+    tables = max(1, min(tables, groups))
+    counts = np.bincount(symbols, minlength=alphabet)
+    used = counts > 0
+
+    # Начальные таблицы: алфавит делится на диапазоны с примерно равной суммарной
+    # частотой; символы своего диапазона дешёвые, остальные — дорогие
+    middle = np.cumsum(counts) - counts / 2
+    owner = np.minimum((middle * tables / n).astype(np.int64), tables - 1)
+    cost = np.where(owner[None, :] == np.arange(tables)[:, None], 0, MAX_CODE_LENGTH).astype(np.uint8)
+
+    # Дополнение последней группы символом с нулевой стоимостью во всех таблицах
+    padded = np.full(groups * group_size, alphabet, dtype=np.int64)
+    padded[:n] = symbols
+    for _ in range(max(1, iterations)):
+        cost = np.concatenate((cost, np.zeros((tables, 1), dtype=np.uint8)), axis=1)
+        group_cost = cost[:, padded].reshape(tables, groups, group_size).sum(axis=2, dtype=np.int64)
+        selectors = group_cost.argmin(axis=0)
+        table_of = np.repeat(selectors, group_size)[:n]
+        # +1 ко всем используемым символам: любая таблица должна уметь закодировать любой символ
+        freq = np.bincount(table_of * alphabet + symbols, minlength=tables * alphabet).reshape(tables, alphabet)
+        freq += used
+        table_lengths = [code_lengths({symbol: int(row[symbol]) for symbol in np.flatnonzero(used).tolist()})
+                         for row in freq]
+        cost = np.zeros((tables, alphabet), dtype=np.uint8)
+        for t, lengths in enumerate(table_lengths):
+            for symbol, length in lengths.items():
+                cost[t, symbol] = length
+
+    # Символ t-й таблицы кодируется как t * alphabet + symbol
+    codes = {}
+    for t, lengths in enumerate(table_lengths):
+        for symbol, code in canonical_codes(lengths).items():
+            codes[t * alphabet + symbol] = code
+    payload, _ = encode_array(table_of * alphabet + symbols, codes)
+
+    order = list(range(tables))
+    selector_mtf = []
+    for selector in selectors.tolist():
+        index = order.index(selector)
+        selector_mtf.append(index)
+        order.insert(0, order.pop(index))
+    unary = {index: ((1 << (index + 1)) - 2, index + 1) for index in range(tables)}
+    selector_bytes, _ = encode(selector_mtf, unary)
+
+    header = bytearray(struct.pack(">IHB", n, group_size, tables))
+    for lengths in table_lengths:
+        header += write_code_lengths(lengths)
+    header += struct.pack(">I", len(selector_bytes))
+    return bytes(header) + selector_bytes + payload
+
+
+def decode_multi_table(data: bytes, pos: int = 0) -> list[int]:
+    """
+    Декодирует поток encode_multi_table, начиная с позиции pos.
+    """
+    n, group_size, tables = struct.unpack(">IHB", data[pos:pos + 7])
+    pos += 7
+    table_lengths = []
+    for _ in range(tables):
+        lengths, pos = read_code_lengths(data, pos)
+        table_lengths.append(lengths)
+    selector_length = struct.unpack(">I", data[pos:pos + 4])[0]
+    pos += 4
+
+    # Селекторы: унарный код индекса MTF, затем обратное MTF по номерам таблиц
+    groups = -(-n // group_size)
+    order = list(range(tables))
+    selectors = []
+    # Унарный код индекса index — index единиц и ноль, не длиннее tables битов;
+    # индекс равен числу ведущих единиц в следующих tables битах буфера
+    selector_data = data[pos:pos + selector_length]
+    mask = (1 << tables) - 1
+    acc = 0
+    nbits = 0
+    selector_pos = 0
+    for _ in range(groups):
+        while nbits < tables:
+            # Подкачка 8 байтов; за концом данных буфер дополняется нулями
+            chunk = selector_data[selector_pos:selector_pos + 8]
+            selector_pos += 8
+            acc = ((acc & ((1 << nbits) - 1)) << 64) | (int.from_bytes(chunk, "big") << (8 * (8 - len(chunk))))
+            nbits += 64
+        peek = (acc >> (nbits - tables)) & mask
+        index = tables - (peek ^ mask).bit_length()
+        if index >= tables:
+            raise ValueError("Некорректные данные: селектор таблицы за пределами числа таблиц.")
+        nbits -= index + 1
+        selector = order.pop(index)
+        order.insert(0, selector)
+        selectors.append(selector)
+    pos += selector_length
+
+    payload = data[pos:]
+    table_bits = min(LOOKUP_BITS, max(8, (len(payload) // tables).bit_length()))
+    decoders = [DecodingTable(lengths, table_bits) for lengths in table_lengths]
+
+    result = []
+    acc = 0
+    nbits = 0
+    pos = 0
+    for group, selector in enumerate(selectors):
+        table = decoders[selector]
+        remaining = min(group_size, n - group * group_size)
+        while remaining:
+            while nbits < table.max_length:
+                # Подкачка 8 байтов; за концом данных буфер дополняется нулями
+                chunk = payload[pos:pos + 8]
+                pos += 8
+                acc = ((acc & ((1 << nbits) - 1)) << 64) | (int.from_bytes(chunk, "big") << (8 * (8 - len(chunk))))
+                nbits += 64
+            peek = (acc >> (nbits - table.table_bits)) & table.mask
+            used = table.bits_used[peek]
+            if used:
+                decoded = table.symbols[peek]
+                if len(decoded) > remaining:
+                    # Запись таблицы выходит за границу группы — берём только её начало
+                    decoded = decoded[:remaining]
+                    used = sum(table.codes[symbol][1] for symbol in decoded)
+                result += decoded
+                remaining -= len(decoded)
+            else:
+                symbol, used = table.read_long_code(acc, nbits)
+                result.append(symbol)
+                remaining -= 1
+            nbits -= used
+
+    return result
@@ -1,16 +1,23 @@
 import struct
 
 from compressor.base import Compressor
+from compressor.match_finder import copy_match, make_match_finder
 
 
 class LZ77Compressor(Compressor):
-    def __init__(self, window_size: int = 10000, lookahead_buffer_size: int = 500):
+    def __init__(self, window_size: int = 10000, lookahead_buffer_size: int = 500,
+                 match_finder: str = "substring", search_depth: int = 64):
         """
         :param window_size: размер буфера поиска (в байтах)
         :param lookahead_buffer_size: размер буфера просмотра (в байтах)
+        :param match_finder: алгоритм поиска совпадений: "substring" (rfind по окну),
+            "binary_tree" (двоичные деревья, для больших окон) или "hash_chain" (хеш-цепочки)
+        :param search_depth: глубина поиска на каждой позиции (число узлов дерева или длина цепочки)
         """
         self.window_size = window_size
         self.lookahead_buffer_size = lookahead_buffer_size
+        self.match_finder = match_finder
+        self.search_depth = search_depth
 
     def compress(self, data: bytes) -> bytes:
         """
@@ -29,23 +36,13 @@ class LZ77Compressor(Compressor):
         n = len(data)
         output = bytearray()
 
-        while pos < n:
-            start_index = max(0, pos - self.window_size)
-            search_buffer = data[start_index:pos]
-
-            match_length = 0
-            match_offset = 0
-            lookahead_limit = min(self.lookahead_buffer_size, n - pos)
+        # Совпадения любой длины от 1 байта: ключ искателя — один байт
+        finder = make_match_finder(self.match_finder, data, self.window_size, self.lookahead_buffer_size,
+                                   1, self.search_depth)
 
+        while pos < n:
             # Ищем наибольшее совпадение
-            for length in range(1, lookahead_limit + 1):
-                substring = data[pos: pos + length]
-                index = search_buffer.rfind(substring)
-                if index != -1:
-                    match_length = length
-                    match_offset = len(search_buffer) - index
-                else:
-                    break
+            match_length, match_offset = finder.find(pos)
 
             # Если после совпадения есть данные (полный токен)
             if pos + match_length < n:
@@ -53,6 +50,8 @@ class LZ77Compressor(Compressor):
                 output += struct.pack(">H", match_offset)
                 output += struct.pack(">H", match_length)
                 output += next_symbol
+                for skipped in range(pos + 1, pos + match_length + 1):
+                    finder.insert(skipped)
                 pos += match_length + 1
             else:
                 # Финальный токен: данных больше нет, поэтому только offset и length (4 байта)
@@ -67,7 +66,8 @@ class LZ77Compressor(Compressor):
           - Пока доступно 5 байт, читается токен (offset, length, next_symbol).
           - Если остаётся ровно 4 байта, обрабатывается финальный токен.
           - Для каждого токена, если offset и length не равны 0, из уже восстановленных данных
-            копируется substring длины length, затем добавляется next_symbol (если он есть).
+            копируется substring длины length (copy_match, в том числе с перекрытием),
+            затем добавляется next_symbol (если он есть).
         """
         if not data:
             return b""
@@ -79,27 +79,21 @@ class LZ77Compressor(Compressor):
         while pos < n:
             # Если осталось 5 или более байт, обрабатываем полный токен
             if n - pos >= 5:
-                offset = struct.unpack(">H", data[pos:pos + 2])[0]
-                length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+                offset, length = struct.unpack_from(">HH", data, pos)
                 next_symbol = data[pos + 4:pos + 5]
                 pos += 5
 
                 if offset == 0 and length == 0:
                     output += next_symbol
                 else:
-                    start_index = len(output) - offset
-                    for i in range(length):
-                        output.append(output[start_index + i])
+                    copy_match(output, offset, length)
                     output += next_symbol
             elif n - pos == 4:
                 # Обработка финального токена (без next_symbol)
-                offset = struct.unpack(">H", data[pos:pos + 2])[0]
-                length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+                offset, length = struct.unpack_from(">HH", data, pos)
                 pos += 4
                 if offset != 0 or length != 0:
-                    start_index = len(output) - offset
-                    for i in range(length):
-                        output.append(output[start_index + i])
+                    copy_match(output, offset, length)
             else:
                 raise ValueError("Некорректный формат данных LZ77.")
 
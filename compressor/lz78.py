@@ -1,61 +1,213 @@
 import struct
+from collections import OrderedDict
 
 from compressor.base import Compressor
 
+# Политики заполненного словаря: не добавлять фразы, сбросить словарь, вытеснить давно не использованную
+POLICIES = ("freeze", "reset", "lru")
+FORMAT_VERSION = 1
+
+
+class _LRUPhrases:
+    """
+    Порядок использования фраз для политики "lru", одинаковый у кодера и декодера:
+    фраза считается использованной, когда её индекс выводится как префикс пары.
+    Вытесняются только листья (фразы без продолжений), иначе продолжения потеряли бы префикс.
+    """
+
+    def __init__(self):
+        self.recency = OrderedDict()
+        self.parent = {}
+        self.children = {}
+
+    def add(self, index: int, parent: int):
+        self.recency[index] = None
+        self.parent[index] = parent
+        self.children[index] = 0
+        if parent:
+            self.children[parent] += 1
+
+    def touch(self, index: int):
+        if index:
+            self.recency.move_to_end(index)
+
+    def evict(self, protected: int):
+        """
+        Удаляет самую давно использованную фразу-лист, кроме protected (префикса новой фразы).
+        Встреченные по пути фразы с продолжениями переносятся в конец очереди.
+        :return: освободившийся индекс или None, если вытеснить нечего
+        """
+        for _ in range(len(self.recency)):
+            index = next(iter(self.recency))
+            if self.children[index] or index == protected:
+                self.recency.move_to_end(index)
+                continue
+            del self.recency[index]
+            del self.children[index]
+            parent = self.parent.pop(index)
+            if parent:
+                self.children[parent] -= 1
+            return index
+        return None
+
 
 class LZ78Compressor(Compressor):
-    def __init__(self, max_dictionary_size: int = None):
+    def __init__(self, max_dictionary_size: int = None, policy: str = "freeze"):
         """
-        :param max_dictionary_size: опциональное ограничение размера словаря (не используется в данной реализации)
+        :param max_dictionary_size: максимальное число фраз в словаре (None — без ограничения)
+        :param policy: что делать с заполненным словарём: "freeze" — больше не добавлять фразы,
+            "reset" — начать словарь заново, "lru" — заменить давно не использованную фразу
         """
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика словаря LZ78: {policy}")
         self.max_dictionary_size = max_dictionary_size
+        self.policy = policy
 
     def compress(self, data: bytes) -> bytes:
         """
-        Выходной формат:
-          - Для "полной" пары: 2 байта для индекса и 1 байт для символа.
-          - Для последней неполной пары (если есть): 2 байта.
+        Выходной формат: [версия][политика] (по 1 байту), [максимальный размер словаря (0 — без ограничения)]
+        и [исходная длина] (по 4 байта), затем битовый поток старшими битами вперёд:
+          - Для "полной" пары: индекс префикса и 8 бит символа.
+          - Для последней неполной пары (если есть): только индекс.
+        Ширина индекса — число бит наибольшего выданного индекса фразы, так что она растёт вместе со словарём.
         """
         if not data:
             return b""
-        dictionary = {}
-        next_index = 1
-        output = bytearray()
-        pos = 0
-        n = len(data)
+        max_size = self.max_dictionary_size or 0
+        policy = self.policy
+        output = bytearray(struct.pack(">BBII", FORMAT_VERSION, POLICIES.index(policy), max_size, len(data)))
+        acc = 0
+        nbits = 0
 
-        while pos < n:
-            current = b""
-            while pos < n:
-                candidate = current + data[pos:pos + 1]
-                if candidate in dictionary:
-                    current = candidate
-                    pos += 1
-                else:
-                    break
-
-            if pos < n:
-                prefix_index = dictionary.get(current, 0)
-                output += struct.pack(">I", prefix_index) + data[pos:pos + 1]
-                dictionary[current + data[pos:pos + 1]] = next_index
-                next_index += 1
-                pos += 1
-            else:
-                if current:
-                    prefix_index = dictionary.get(current, 0)
-                    output += struct.pack(">I", prefix_index)
-                break
+        # Словарь — префиксное дерево: ключ (индекс префикса << 8) | байт, значение — индекс фразы.
+        # Индекс 0 — пустая фраза.
+        trie = {}
+        keys = {}
+        lru = _LRUPhrases()
+        top = 0
+        current = 0
+
+        for byte in data:
+            key = (current << 8) | byte
+            child = trie.get(key)
+            if child is not None:
+                current = child
+                continue
+
+            # Пара (префикс, символ) пишется одним числом — тем же ключом дерева
+            width = top.bit_length() + 8
+            acc = (acc << width) | key
+            nbits += width
+            while nbits >= 8:
+                nbits -= 8
+                output.append((acc >> nbits) & 0xFF)
+            acc &= (1 << nbits) - 1
+
+            if policy == "lru":
+                lru.touch(current)
+            if not max_size or top < max_size:
+                top += 1
+                trie[key] = top
+                if policy == "lru":
+                    keys[top] = key
+                    lru.add(top, current)
+            elif policy == "reset":
+                trie = {}
+                top = 0
+            elif policy == "lru":
+                index = lru.evict(current)
+                if index is not None:
+                    del trie[keys[index]]
+                    trie[key] = index
+                    keys[index] = key
+                    lru.add(index, current)
+            current = 0
+
+        if current:
+            # Последняя неполная пара: только индекс
+            width = top.bit_length()
+            acc = (acc << width) | current
+            nbits += width
+        while nbits >= 8:
+            nbits -= 8
+            output.append((acc >> nbits) & 0xFF)
+        if nbits:
+            output.append((acc << (8 - nbits)) & 0xFF)
 
         return bytes(output)
 
     def decompress(self, data: bytes) -> bytes:
         """
-          - Пока остаётся не менее 3 байт, читаем пару (2 байта – индекс, 1 байт – символ),
-            формируем новую последовательность: dictionary[index] + символ, добавляем её в словарь и выводим.
-          - Если остаётся ровно 2 байта, читаем финальный индекс и выводим соответствующую последовательность из словаря.
+          - Пока не восстановлена исходная длина, читаем пару (индекс той же ширины, что у кодера, и символ),
+            формируем новую последовательность: dictionary[index] + символ, выводим её и обновляем
+            словарь по той же политике, что и кодер.
+          - Если оставшаяся длина равна длине фразы по прочитанному индексу, это финальная пара без символа.
+        Потоки старого формата (пары по 5 байт) начинаются с нулевого байта и разбираются _decompress_legacy.
         """
         if not data:
             return b""
+        if data[0] == 0:
+            return self._decompress_legacy(data)
+        if data[0] != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата LZ78: {data[0]}")
+
+        _, policy_index, max_size, length = struct.unpack(">BBII", data[:10])
+        policy = POLICIES[policy_index]
+        pos, n = 10, len(data)
+        acc = 0
+        nbits = 0
+        output = bytearray()
+
+        dictionary = {0: b""}
+        lru = _LRUPhrases()
+        top = 0
+
+        while len(output) < length:
+            width = top.bit_length()
+            while nbits < width + 8 and pos < n:
+                acc = (acc << 8) | data[pos]
+                pos += 1
+                nbits += 8
+            if nbits < width:
+                raise ValueError("Некорректный формат данных LZ78.")
+            prefix_index = (acc >> (nbits - width)) & ((1 << width) - 1)
+            if prefix_index not in dictionary:
+                raise ValueError(f"Некорректный индекс LZ78: {prefix_index}")
+            prefix = dictionary[prefix_index]
+            if len(output) + len(prefix) == length:
+                # Финальная пара без символа
+                output += prefix
+                break
+            if nbits < width + 8:
+                raise ValueError("Некорректный формат данных LZ78.")
+            nbits -= width + 8
+            entry = prefix + bytes(((acc >> nbits) & 0xFF,))
+            acc &= (1 << nbits) - 1
+            output += entry
+
+            if policy == "lru":
+                lru.touch(prefix_index)
+            if not max_size or top < max_size:
+                top += 1
+                dictionary[top] = entry
+                if policy == "lru":
+                    lru.add(top, prefix_index)
+            elif policy == "reset":
+                dictionary = {0: b""}
+                top = 0
+            elif policy == "lru":
+                index = lru.evict(prefix_index)
+                if index is not None:
+                    dictionary[index] = entry
+                    lru.add(index, prefix_index)
+
+        return bytes(output)
+
+    @staticmethod
+    def _decompress_legacy(data: bytes) -> bytes:
+        """
+        Старый формат: пары (4 байта – индекс, 1 байт – символ) и финальный индекс без символа.
+        """
         dictionary = {0: b""}
         next_index = 1
         output = bytearray()
@@ -0,0 +1,250 @@
+# Порция байтов, которыми сравниваются кандидаты перед побайтовым дочитыванием
+COMPARE_CHUNK = 16
+# Длина, начиная с которой двоичное дерево считает суффиксы равными
+NICE_LENGTH = 64
+
+
+def match_length(data, a: int, b: int, limit: int) -> int:
+    """
+    Длина общего префикса data[a:] и data[b:], не больше limit.
+    Сначала сравниваются срезы по COMPARE_CHUNK байтов (на уровне C), затем хвост побайтово.
+    """
+    length = 0
+    while length + COMPARE_CHUNK <= limit and \
+            data[a + length:a + length + COMPARE_CHUNK] == data[b + length:b + length + COMPARE_CHUNK]:
+        length += COMPARE_CHUNK
+    while length < limit and data[a + length] == data[b + length]:
+        length += 1
+    return length
+
+
+def copy_match(out: bytearray, offset: int, length: int):
+    """
+    Дописывает в out length байтов, начиная с позиции len(out) - offset.
+    При перекрытии (offset < length) копируемый фрагмент периодичен с периодом offset,
+    поэтому последние offset байтов повторяются умножением и дописываются одним срезом,
+    а не побайтово.
+    """
+    start = len(out) - offset
+    if offset <= 0 or start < 0:
+        raise ValueError("Некорректная ссылка: смещение за пределами восстановленных данных.")
+    if offset >= length:
+        out += out[start:start + length]
+        return
+    out += (out[start:] * (length // offset + 1))[:length]
+
+
+class HashChainMatchFinder:
+    def __init__(self, data: bytes, window_size: int, max_match: int, min_match: int = 3, max_chain: int = 64):
+        """
+        Поиск совпадений по хеш-цепочкам: позиции с одинаковыми следующими min_match
+        байтами связаны в цепочку от ближайшей к дальней. Цепочка хранится в кольцевом
+        массиве prev размером window_size, поэтому память ограничена размером окна.
+        :param data: входные данные
+        :param window_size: размер буфера поиска (максимальное смещение)
+        :param max_match: максимальная длина совпадения
+        :param min_match: длина ключа хеша (минимальная полезная длина совпадения)
+        :param max_chain: максимальное число просматриваемых кандидатов на позицию
+        """
+        self.data = data
+        self.window_size = window_size
+        self.max_match = max_match
+        self.min_match = max(1, min_match)
+        self.max_chain = max_chain
+        self.head = {}
+        self.prev = [-1] * window_size
+
+    def insert(self, pos: int):
+        """
+        Добавляет позицию в цепочку своего ключа без поиска совпадения.
+        """
+        key = self.data[pos:pos + self.min_match]
+        if len(key) < self.min_match:
+            return
+        self.prev[pos % self.window_size] = self.head.get(key, -1)
+        self.head[key] = pos
+
+    def find(self, pos: int) -> tuple[int, int]:
+        """
+        Ищет самое длинное совпадение для позиции pos (при равной длине — ближайшее)
+        и добавляет pos в цепочку.
+        Совпадение начинается в окне до pos, но может заходить на кодируемые данные
+        (смещение меньше длины) — декодер копирует его через copy_match.
+        :return: (длина, смещение); (0, 0), если совпадений нет
+        """
+        data = self.data
+        key = data[pos:pos + self.min_match]
+        if len(key) < self.min_match:
+            return 0, 0
+
+        best_length = 0
+        best_offset = 0
+        max_match = min(self.max_match, len(data) - pos)
+        lowest = pos - self.window_size
+        candidate = self.head.get(key, -1)
+        chain = self.max_chain
+        while candidate >= 0 and candidate >= lowest and chain > 0:
+            # Быстрая отбраковка: кандидат не может быть длиннее, если не совпал следующий байт
+            if data[candidate + best_length] == data[pos + best_length]:
+                length = match_length(data, candidate, pos, max_match)
+                if length > best_length:
+                    best_length = length
+                    best_offset = pos - candidate
+                    if length == max_match:
+                        break
+            candidate = self.prev[candidate % self.window_size]
+            chain -= 1
+
+        self.prev[pos % self.window_size] = self.head.get(key, -1)
+        self.head[key] = pos
+        return best_length, best_offset
+
+
+class BinaryTreeMatchFinder:
+    def __init__(self, data: bytes, window_size: int, max_match: int, min_match: int = 3, max_depth: int = 64,
+                 nice_length: int = NICE_LENGTH):
+        """
+        Поиск совпадений по двоичным деревьям (как bt-искатель LZMA): позиции окна
+        с одинаковым ключом из min_match байтов образуют двоичное дерево поиска,
+        упорядоченное лексикографически по суффиксам. Вставка новой позиции спускается
+        от корня, попутно находя самые длинные совпадения, и делает её новым корнем,
+        так что поиск стоит около O(log window) сравнений на позицию даже на
+        повторяющихся данных, где хеш-цепочки вырождаются.
+        Потомки хранятся в кольцевом массиве son: son[2k] — меньший, son[2k + 1] — больший.
+        :param max_depth: максимальное число узлов, просматриваемых при спуске
+        :param nice_length: суффиксы сравниваются в дереве не дальше этой длины;
+            совпадение такой длины дочитывается напрямую, без спуска по дереву
+        """
+        self.data = data
+        self.window_size = window_size
+        self.max_match = max_match
+        self.min_match = max(1, min_match)
+        self.max_depth = max_depth
+        self.nice_length = nice_length
+        self.head = {}
+        # Кольцо на window_size + 1 позиций: смещение window_size ещё допустимо
+        self.cyclic_size = window_size + 1
+        self.son = [-1] * (2 * self.cyclic_size)
+
+    def insert(self, pos: int):
+        """
+        Добавляет позицию в дерево без поиска совпадения.
+        """
+        self._update(pos, False)
+
+    def find(self, pos: int) -> tuple[int, int]:
+        """
+        Ищет самое длинное совпадение для позиции pos и добавляет pos в дерево.
+        Совпадение может заходить на кодируемые данные (см. HashChainMatchFinder.find).
+        :return: (длина, смещение); (0, 0), если совпадений нет
+        """
+        return self._update(pos, True)
+
+    def _update(self, pos: int, extend: bool) -> tuple[int, int]:
+        data = self.data
+        key = data[pos:pos + self.min_match]
+        if len(key) < self.min_match:
+            return 0, 0
+        candidate = self.head.get(key, -1)
+        self.head[key] = pos
+
+        son = self.son
+        cyclic_size = self.cyclic_size
+        cyclic_pos = pos % cyclic_size
+        # Слоты, куда будут подвешены следующие меньший и больший узлы
+        ptr_less = 2 * cyclic_pos
+        ptr_greater = 2 * cyclic_pos + 1
+        len_less = len_greater = 0
+        max_match = min(self.max_match, len(data) - pos)
+        limit = min(max_match, self.nice_length)
+        lowest = max(pos - self.window_size, 0)
+        best_length = 0
+        best_offset = 0
+        depth = self.max_depth
+
+        while True:
+            if candidate < lowest or depth == 0:
+                son[ptr_less] = son[ptr_greater] = -1
+                break
+            depth -= 1
+            pair = 2 * (candidate % cyclic_size)
+            # Общий префикс не короче меньшего из префиксов с границами поддерева
+            length = len_less if len_less < len_greater else len_greater
+            if length < limit and data[candidate + length] == data[pos + length]:
+                length += match_length(data, candidate + length + 1, pos + length + 1, limit - length - 1) + 1
+            if length > best_length:
+                best_length = length
+                best_offset = pos - candidate
+            if length == limit:
+                # Суффиксы равны в пределах limit: pos занимает место кандидата в дереве
+                son[ptr_less] = son[pair]
+                son[ptr_greater] = son[pair + 1]
+                if extend and limit < max_match:
+                    best_length = limit + match_length(data, candidate + limit, pos + limit, max_match - limit)
+                    best_offset = pos - candidate
+                break
+            if data[candidate + length] < data[pos + length]:
+                son[ptr_less] = candidate
+                ptr_less = pair + 1
+                candidate = son[ptr_less]
+                len_less = length
+            else:
+                son[ptr_greater] = candidate
+                ptr_greater = pair
+                candidate = son[ptr_greater]
+                len_greater = length
+
+        return best_length, best_offset
+
+
+class SubstringMatchFinder:
+    def __init__(self, data: bytes, window_size: int, max_match: int, min_match: int = 1, max_depth: int = 0):
+        """
+        Прямой поиск: префиксы растущей длины ищутся в окне через bytes.rfind.
+        Индекса не строит; на небольших окнах быстрее остальных за счёт поиска на уровне C,
+        но каждый шаг стоит O(window) и растёт вместе с окном.
+        min_match и max_depth не используются и оставлены для единого интерфейса.
+        """
+        self.data = data
+        self.window_size = window_size
+        self.max_match = max_match
+
+    def insert(self, pos: int):
+        pass
+
+    def find(self, pos: int) -> tuple[int, int]:
+        """
+        Ищет самое длинное совпадение (при равной длине — ближайшее), начинающееся в окне до pos;
+        совпадение может заходить на кодируемые данные.
+        :return: (длина, смещение); (0, 0), если совпадений нет
+        """
+        data = self.data
+        lowest = max(0, pos - self.window_size)
+        best_length = 0
+        best_offset = 0
+        for length in range(1, min(self.max_match, len(data) - pos) + 1):
+            # Начало вхождения — не дальше pos - 1
+            index = data.rfind(data[pos:pos + length], lowest, pos + length - 1)
+            if index == -1:
+                break
+            best_length = length
+            best_offset = pos - index
+        return best_length, best_offset
+
+
+MATCH_FINDERS = {
+    "substring": SubstringMatchFinder,
+    "hash_chain": HashChainMatchFinder,
+    "binary_tree": BinaryTreeMatchFinder,
+}
+
+
+def make_match_finder(engine: str, data: bytes, window_size: int, max_match: int, min_match: int, depth: int):
+    """
+    Создаёт искатель совпадений по имени алгоритма.
+    :param engine: "substring", "hash_chain" или "binary_tree"
+    :param depth: глубина поиска (длина хеш-цепочки или число узлов дерева)
+    """
+    if engine not in MATCH_FINDERS:
+        raise ValueError(f"Неизвестный алгоритм поиска совпадений: {engine}")
+    return MATCH_FINDERS[engine](data, window_size, max_match, min_match, depth)
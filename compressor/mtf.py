@@ -14,16 +14,21 @@ class MTFCompressor(Compressor):
         if not data:
             return b""
 
-        # Инициализируем алфавит
-        alphabet = list(range(self.alphabet_length))
-        output = bytearray()
-
-        for byte in data:
+        # Алфавит хранится в bytearray: поиск (index) и сдвиг выполняются на уровне C
+        alphabet = bytearray(range(self.alphabet_length))
+        output = bytearray(len(data))
+        front = alphabet[0]
+
+        for i, byte in enumerate(data):
+            # Быстрый путь: повтор символа (после BWT — самый частый случай), индекс 0
+            if byte == front:
+                continue
             index = alphabet.index(byte)
-            output.append(index)
-            # Перемещаем найденный байт в начало списка
-            alphabet.pop(index)
+            output[i] = index
+            # Перемещаем найденный байт в начало таблицы (memmove внутри bytearray)
+            del alphabet[index]
             alphabet.insert(0, byte)
+            front = byte
 
         return bytes(output)
 
@@ -32,15 +37,15 @@ class MTFCompressor(Compressor):
         if not data:
             return b""
 
-        # Инициализируем алфавит
-        alphabet = list(range(self.alphabet_length))
-        output = bytearray()
+        alphabet = bytearray(range(self.alphabet_length))
+        output = bytearray(len(data))
+        front = alphabet[0]
 
-        for index in data:
-            byte = alphabet[index]
-            output.append(byte)
-            # Перемещаем символ в начало списка
-            alphabet.pop(index)
-            alphabet.insert(0, byte)
+        for i, index in enumerate(data):
+            if index:
+                front = alphabet.pop(index)
+                # Перемещаем символ в начало таблицы
+                alphabet.insert(0, front)
+            output[i] = front
 
         return bytes(output)
@@ -1,19 +1,192 @@
+from array import array
+
+import numpy as np
+
 from compressor.base import Compressor
 
+# Цифры биективной двоичной записи длины серии нулей (как RUNA/RUNB в bzip2)
+RUNA = 0
+RUNB = 1
+
+
+def zero_run_digits(length: int) -> list[int]:
+    """
+    Записывает длину серии (length >= 1) в биективной системе счисления по основанию 2,
+    младшие разряды первыми: RUNA весит 1 * 2^k, RUNB — 2 * 2^k.
+    Серия длины L кодируется примерно log2(L) символами.
+    """
+    digits = []
+    while length > 0:
+        if length & 1:
+            digits.append(RUNA)
+            length = (length - 1) >> 1
+        else:
+            digits.append(RUNB)
+            length = (length - 2) >> 1
+    return digits
+
+
+def write_varint(out: bytearray, value: int):
+    """
+    Записывает неотрицательное число в формате varint (LEB128): по 7 бит, младшие первыми,
+    старший бит байта означает продолжение.
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """
+    Читает число varint, записанное write_varint.
+    :return: (число, позиция после него)
+    """
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Некорректные данные: обрезанное число varint.")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def split_runs(data: bytes, cap: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Разбивает данные на серии одинаковых байтов (границы — там, где diff не равен нулю),
+    а серии длиннее cap — на куски по cap байтов (последний кусок — остаток).
+    :return: значения и длины кусков по порядку
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    starts = np.flatnonzero(np.concatenate(([True], arr[1:] != arr[:-1])))
+    lengths = np.diff(np.append(starts, len(arr)))
+    pieces = (lengths + cap - 1) // cap
+    run_of_piece = np.repeat(np.arange(len(starts)), pieces)
+    # Номер куска внутри своей серии
+    k = np.arange(len(run_of_piece)) - (np.cumsum(pieces) - pieces)[run_of_piece]
+    return arr[starts][run_of_piece], np.minimum(cap, lengths[run_of_piece] - k * cap)
+
 
 class RLECompressor(Compressor):
-    def __init__(self, min_run_length: int = 2):
+    # Сколько управляющих байтов разворачивается за один шаг векторного декодера
+    DECODE_BATCH = 1 << 14
+    MODES = ("control", "zero_run", "varint")
+    # Префикс значений 254 и 255 в режиме "zero_run"
+    ESCAPE = 255
+
+    def __init__(self, min_run_length: int = 2, mode: str = "control"):
         """
         :param min_run_length: минимальная длина последовательности одинаковых байтов,
         при которой она будет считаться повторяющейся.
         Всё, что короче — будет обрабатываться как уникальная последовательность (литерал).
+        :param mode: формат потока: "control" — управляющие байты с длинами до 127;
+            "zero_run" — только серии нулей, цифрами RUNA/RUNB (для вывода MTF);
+            "varint" — длины серий и групп литералов без ограничения, в формате varint.
+            Декодер должен быть создан с тем же режимом.
         """
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим RLE: {mode}")
         self.min_run_length = min_run_length
+        self.mode = mode
 
     def compress(self, data: bytes) -> bytes:
-       
+        """
+        Формат "control": управляющий байт, старший бит которого 0 для серии (7 бит — длина, затем байт)
+        и 1 для группы литералов (7 бит — число байтов, затем сами байты).
+        При min_run_length <= 2 поток строится векторно (_compress_numpy), иначе — циклом по байтам.
+        Форматы других режимов описаны в _compress_zero_run и _compress_varint.
+        """
         if not data:
             return b""
+        if self.mode == "zero_run":
+            return self._compress_zero_run(data)
+        if self.mode == "varint":
+            return self._compress_varint(data)
+        if self.min_run_length <= 2:
+            return self._compress_numpy(data)
+        return self._compress_python(data)
+
+    def _compress_zero_run(self, data: bytes) -> bytes:
+        """
+        Серия нулей любой длины записывается цифрами RUNA/RUNB (байты 0 и 1, см. zero_run_digits),
+        остальные байты v — как v + 1; значения 254 и 255 — парой [ESCAPE][v - 254].
+        Повторы ненулевых байтов не сворачиваются: после MTF они превращаются в нули.
+        """
+        values, lengths = split_runs(data, len(data))
+        out = bytearray()
+        for value, length in zip(values.tolist(), lengths.tolist()):
+            if value == 0:
+                out += bytes(zero_run_digits(length))
+            elif value < 254:
+                out += bytes((value + 1,)) * length
+            else:
+                out += bytes((self.ESCAPE, value - 254)) * length
+        return bytes(out)
+
+    def _compress_varint(self, data: bytes) -> bytes:
+        """
+        Токены: varint (count << 1) | 1 и байт — серия длины count >= min_run_length;
+        varint (count << 1) и count байтов — группа литералов. Длины не ограничены.
+        """
+        values, lengths = split_runs(data, len(data))
+        out = bytearray()
+        pos = 0
+        literal_start = 0
+        for value, length in zip(values.tolist(), lengths.tolist()):
+            if length >= max(self.min_run_length, 2):
+                if literal_start < pos:
+                    write_varint(out, (pos - literal_start) << 1)
+                    out += data[literal_start:pos]
+                write_varint(out, (length << 1) | 1)
+                out.append(value)
+                literal_start = pos + length
+            pos += length
+        if literal_start < pos:
+            write_varint(out, (pos - literal_start) << 1)
+            out += data[literal_start:pos]
+        return bytes(out)
+
+    def _compress_numpy(self, data: bytes) -> bytes:
+        """
+        Серии, разбитые по 127 байтов, становятся блоками повторений; куски длины 1
+        (при min_run_length == 2) подряд объединяются в группы литералов до 127 байтов.
+        Даёт тот же поток, что и _compress_python.
+        """
+        values, lengths = split_runs(data, 127)
+        count = len(values)
+        if self.min_run_length == 2:
+            single = lengths == 1
+        else:
+            single = np.zeros(count, dtype=bool)
+
+        # Отрезки подряд идущих одиночных байтов и позиция каждого байта в своём отрезке
+        first = single & ~np.concatenate(([False], single[:-1]))
+        last = single & ~np.concatenate((single[1:], [False]))
+        stretch_start = np.flatnonzero(first)
+        stretch_len = np.flatnonzero(last) - stretch_start + 1
+        stretch_id = np.maximum(np.cumsum(first) - 1, 0)
+        k = np.arange(count) - stretch_start[stretch_id] if len(stretch_start) else np.zeros(count, dtype=np.intp)
+        # Первый байт каждой группы литералов получает перед собой управляющий байт
+        group_first = single & (k % 127 == 0)
+        group_len = np.minimum(127, stretch_len[stretch_id[group_first]] - k[group_first])
+
+        sizes = np.where(single, 1 + group_first, 2)
+        offsets = np.cumsum(sizes) - sizes
+        out = np.empty(int(sizes.sum()), dtype=np.uint8)
+
+        runs = ~single
+        out[offsets[runs]] = lengths[runs]
+        out[offsets[runs] + 1] = values[runs]
+        heads = offsets[group_first]
+        out[heads] = 0x80 | group_len
+        out[offsets[single] + group_first[single]] = values[single]
+        return out.tobytes()
+
+    def _compress_python(self, data: bytes) -> bytes:
 
         compressed = bytearray()
         i = 0
@@ -56,33 +229,96 @@ class RLECompressor(Compressor):
         return bytes(compressed)
 
     def decompress(self, data: bytes) -> bytes:
-       
         if not data:
             return b""
+        if self.mode == "zero_run":
+            return self._decompress_zero_run(data)
+        if self.mode == "varint":
+            return self._decompress_varint(data)
+        return self._decompress_control(data)
 
-        decompressed = bytearray()
-        i = 0
-        n = len(data)
+    def _decompress_zero_run(self, data: bytes) -> bytes:
+        """
+        Векторное обратное преобразование: подряд идущие цифры RUNA/RUNB сворачиваются
+        в длину серии через np.add.reduceat, затем серии и одиночные значения
+        разворачиваются одним np.repeat.
+        """
+        arr = np.frombuffer(data, dtype=np.uint8)
+        escape = arr == self.ESCAPE
+        if escape[-1]:
+            raise ValueError("Некорректные данные: отсутствует байт после экранирования.")
+        payload = np.concatenate(([False], escape[:-1]))
+        digit = (arr <= RUNB) & ~payload
+        value_mask = ~digit & ~payload
 
+        values = arr.astype(np.int64) - 1
+        escape_pos = np.flatnonzero(escape)
+        values[escape_pos] = arr[escape_pos + 1].astype(np.int64) + 254
+
+        # Начало каждой серии цифр и вклад цифры: RUNA — 2^k, RUNB — 2 * 2^k
+        digit_start = digit & ~np.concatenate(([False], digit[:-1]))
+        digit_pos = np.flatnonzero(digit)
+        group_start = np.flatnonzero(digit_start[digit_pos])
+        group_id = np.cumsum(digit_start[digit_pos]) - 1
+        k = np.arange(len(digit_pos)) - group_start[group_id]
+        contributions = (arr[digit_pos].astype(np.int64) + 1) << k
+        counts = np.ones(len(arr), dtype=np.int64)
+        if len(digit_pos):
+            counts[digit_start] = np.add.reduceat(contributions, group_start)
+        values[digit_start] = 0
+
+        items = digit_start | value_mask
+        return np.repeat(values[items].astype(np.uint8), counts[items]).tobytes()
+
+    def _decompress_varint(self, data: bytes) -> bytes:
+        out = bytearray()
+        pos, n = 0, len(data)
+        while pos < n:
+            header, pos = read_varint(data, pos)
+            count = header >> 1
+            if header & 1:
+                if pos >= n:
+                    raise ValueError("Некорректные данные: отсутствует байт для повторения.")
+                out += data[pos:pos + 1] * count
+                pos += 1
+            else:
+                if pos + count > n:
+                    raise ValueError("Некорректные данные: длина литералов превышает оставшиеся байты.")
+                out += data[pos:pos + count]
+                pos += count
+        return bytes(out)
+
+    def _decompress_control(self, data: bytes) -> bytes:
+        """
+        Позиции управляющих байтов находятся одним проходом по блокам, затем каждая пачка
+        блоков разворачивается одной выборкой по индексам: для серии индекс источника
+        стоит на месте (np.repeat байта), для литералов — растёт на единицу.
+        """
+        n = len(data)
+        positions = array("q")
+        i = 0
         while i < n:
+            positions.append(i)
             control_byte = data[i]
-            i += 1
-
             # Определяем тип блока: если старший бит = 1, это литерал (уникальные байты)
-            is_literal = (control_byte & 0b10000000) != 0
-            # Получаем длину блока, отбросив старший бит
-            length = control_byte & 0b01111111
+            i += 1 + (control_byte & 0b01111111) if control_byte & 0b10000000 else 2
+        if i > n:
+            if data[positions[-1]] & 0b10000000:
+                raise ValueError("Некорректные данные: длина литералов превышает оставшиеся байты.")
+            raise ValueError("Некорректные данные: отсутствует байт для повторения.")
 
-            if is_literal:
-                if i + length > n:
-                    raise ValueError("Некорректные данные: длина литералов превышает оставшиеся байты.")
-                decompressed.extend(data[i:i + length])  
-                i += length
-            else:
-                if i >= n:
-                    raise ValueError("Некорректные данные: отсутствует байт для повторения.")
-                byte = data[i]
-                decompressed.extend([byte] * length)  
-                i += 1
+        arr = np.frombuffer(data, dtype=np.uint8)
+        positions = np.frombuffer(positions, dtype=np.int64)
+        pieces = []
+        for start in range(0, len(positions), self.DECODE_BATCH):
+            pos = positions[start:start + self.DECODE_BATCH]
+            control = arr[pos]
+            step = (control >> 7).astype(np.int64)
+            # Получаем длину блока, отбросив старший бит
+            length = (control & 0b01111111).astype(np.int64)
+            out_offsets = np.cumsum(length) - length
+            total = int(length.sum())
+            source = np.repeat(pos + 1 - out_offsets * step, length) + np.arange(total) * np.repeat(step, length)
+            pieces.append(arr[source].tobytes())
 
-        return bytes(decompressed)
+        return b"".join(pieces)
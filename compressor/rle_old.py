@@ -1,4 +1,7 @@
+import numpy as np
+
 from compressor.base import Compressor
+from compressor.rle import split_runs
 
 
 class OLD_RLECompressor(Compressor):
@@ -16,25 +19,13 @@ class OLD_RLECompressor(Compressor):
         if not data:
             return b""
 
-        compressed = bytearray()
-        n = len(data)
-        i = 0
-
-        while i < n:
-            current_byte = data[i]
-            count = 1
-            # Подсчёт количества повторов
-            while (i + count < n) and (data[i + count] == current_byte) and (count < 255):
-                count += 1
+        # Серии длиннее 255 разбиваются на куски, каждый кусок — пара (count, value)
+        values, counts = split_runs(data, 255)
+        compressed = np.empty(2 * len(values), dtype=np.uint8)
+        compressed[0::2] = counts
+        compressed[1::2] = values
 
-            # Если количество повторов меньше минимального порога, кодируем как отдельную пару.
-            # Можно изменить стратегию обработки "литералов", но в данном случае мы всегда кодируем как (count, value)
-            compressed.append(count)
-            compressed.append(current_byte)
-
-            i += count
-
-        return bytes(compressed)
+        return compressed.tobytes()
 
     def decompress(self, data: bytes) -> bytes:
         """
@@ -43,16 +34,11 @@ class OLD_RLECompressor(Compressor):
         if not data:
             return b""
 
-        decompressed = bytearray()
         n = len(data)
 
         # Ожидается, что данные состоят из пар
         if n % 2 != 0:
             raise ValueError("Некорректные данные для OLD_RLE-декомпрессии: нечётное число байтов.")
 
-        for i in range(0, n, 2):
-            count = data[i]
-            value = data[i + 1]
-            decompressed.extend([value] * count)
-
-        return bytes(decompressed)
+        pairs = np.frombuffer(data, dtype=np.uint8)
+        return np.repeat(pairs[1::2], pairs[0::2]).tobytes()
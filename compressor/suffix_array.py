@@ -0,0 +1,184 @@
+from array import array
+
+import numpy as np
+
+
+def sais(s, upper: int) -> array:
+    """
+    Построение суффиксного массива алгоритмом SA-IS (induced sorting) за O(n).
+    Рабочие массивы — array('i') и bytearray, а не списки Python-объектов.
+    :param s: последовательность целых чисел из диапазона [0, upper] (bytes, array, list)
+    :param upper: максимальное значение символа
+    :return: суффиксный массив (более короткий суффикс-префикс идёт раньше)
+    """
+    n = len(s)
+    if n == 0:
+        return array("i")
+    if n == 1:
+        return array("i", [0])
+    if n == 2:
+        return array("i", [0, 1] if s[0] < s[1] else [1, 0])
+
+    sa = array("i", [0]) * n
+    # ls[i] == 1 — суффикс i S-типа (меньше следующего), иначе L-типа
+    ls = bytearray(n)
+    for i in range(n - 2, -1, -1):
+        ls[i] = ls[i + 1] if s[i] == s[i + 1] else (s[i] < s[i + 1])
+
+    # Границы корзин: sum_l — начало корзины символа, sum_s — начало S-части корзины
+    sum_l = array("i", [0]) * (upper + 1)
+    sum_s = array("i", [0]) * (upper + 1)
+    for i in range(n):
+        if not ls[i]:
+            sum_s[s[i]] += 1
+        else:
+            sum_l[s[i] + 1] += 1
+    for i in range(upper + 1):
+        sum_s[i] += sum_l[i]
+        if i < upper:
+            sum_l[i + 1] += sum_s[i]
+
+    def induce(lms):
+        sa[:] = array("i", [-1]) * n
+        buf = sum_s[:]
+        for d in lms:
+            if d == n:
+                continue
+            sa[buf[s[d]]] = d
+            buf[s[d]] += 1
+        # Индуцируем L-суффиксы проходом слева направо
+        buf = sum_l[:]
+        sa[buf[s[n - 1]]] = n - 1
+        buf[s[n - 1]] += 1
+        for i in range(n):
+            v = sa[i]
+            if v >= 1 and not ls[v - 1]:
+                sa[buf[s[v - 1]]] = v - 1
+                buf[s[v - 1]] += 1
+        # Индуцируем S-суффиксы проходом справа налево
+        buf = sum_l[:]
+        for i in range(n - 1, -1, -1):
+            v = sa[i]
+            if v >= 1 and ls[v - 1]:
+                buf[s[v - 1] + 1] -= 1
+                sa[buf[s[v - 1] + 1]] = v - 1
+
+    # LMS-позиции: S-суффикс, перед которым стоит L-суффикс
+    lms_map = array("i", [-1]) * (n + 1)
+    lms = array("i")
+    for i in range(1, n):
+        if not ls[i - 1] and ls[i]:
+            lms_map[i] = len(lms)
+            lms.append(i)
+    m = len(lms)
+
+    induce(lms)
+
+    if m:
+        sorted_lms = array("i", (v for v in sa if lms_map[v] != -1))
+        # Присваиваем LMS-подстрокам имена и рекурсивно сортируем сокращённую строку
+        rec_s = array("i", [0]) * m
+        rec_upper = 0
+        rec_s[lms_map[sorted_lms[0]]] = 0
+        for i in range(1, m):
+            left, right = sorted_lms[i - 1], sorted_lms[i]
+            end_l = lms[lms_map[left] + 1] if lms_map[left] + 1 < m else n
+            end_r = lms[lms_map[right] + 1] if lms_map[right] + 1 < m else n
+            same = True
+            if end_l - left != end_r - right:
+                same = False
+            else:
+                while left < end_l:
+                    if s[left] != s[right]:
+                        break
+                    left += 1
+                    right += 1
+                if left == n or s[left] != s[right]:
+                    same = False
+            if not same:
+                rec_upper += 1
+            rec_s[lms_map[sorted_lms[i]]] = rec_upper
+        # Карта LMS-позиций больше не нужна; освобождаем её до рекурсии
+        del lms_map
+
+        # Если все имена различны, LMS-суффиксы уже упорядочены — рекурсия не нужна
+        if rec_upper + 1 < m:
+            rec_sa = sais(rec_s, rec_upper)
+            for i in range(m):
+                sorted_lms[i] = lms[rec_sa[i]]
+        induce(sorted_lms)
+
+    return sa
+
+
+def cyclic_sa_sais(block: bytes) -> array:
+    """
+    Циклический суффиксный массив (порядок всех вращений блока) через SA-IS.
+    Вращение i блока T — это префикс длины n суффикса i строки T+T, поэтому
+    достаточно отсортировать суффиксы удвоенной строки и оставить позиции < n.
+    Одинаковые вращения (периодический блок) дают одинаковые символы последнего
+    столбца, так что их взаимный порядок на результат BWT не влияет.
+    """
+    n = len(block)
+    if n == 0:
+        return array("i")
+    return array("i", (i for i in sais(bytes(block) * 2, 255) if i < n))
+
+
+class SuffixArrayWorkspace:
+    """
+    Переиспользуемые буферы для cyclic_sa_numpy: выделяются один раз под
+    наибольший блок и используются во всех раундах и во всех блоках.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = 0
+        self._reserve(capacity)
+
+    def _reserve(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        self.capacity = capacity
+        self.rank = np.empty(capacity, dtype=np.int32)
+        self.new_rank = np.empty(capacity, dtype=np.int32)
+        self.key = np.empty(capacity, dtype=np.int64)
+        self.sorted_key = np.empty(capacity, dtype=np.int64)
+        self.changed = np.empty(capacity, dtype=bool)
+
+    def views(self, n: int) -> tuple[np.ndarray, ...]:
+        self._reserve(n)
+        return self.rank[:n], self.new_rank[:n], self.key[:n], self.sorted_key[:n], self.changed[:n]
+
+
+def cyclic_sa_numpy(block: bytes, workspace: SuffixArrayWorkspace = None) -> np.ndarray:
+    """
+    Циклический суффиксный массив удвоением префиксов на массивах NumPy.
+    На каждом раунде пара рангов (rank[i], rank[i + k]) склеивается в один
+    ключ int64 и сортируется устойчиво, а новые ранги пересчитываются
+    векторно через diff/cumsum вместо поэлементного цикла.
+    :param workspace: буферы для повторного использования между блоками
+    """
+    n = len(block)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+
+    rank, new_rank, key, sorted_key, changed = (workspace or SuffixArrayWorkspace()).views(n)
+    rank[:] = np.frombuffer(block, dtype=np.uint8)
+    sa = np.argsort(rank, kind="stable")
+    k = 1
+    while k < n:
+        # key[i] = rank[i] * (n + 256) + rank[(i + k) % n]
+        np.multiply(rank, n + 256, out=key, dtype=np.int64)
+        key[:n - k] += rank[k:]
+        key[n - k:] += rank[:k]
+        sa = np.argsort(key, kind="stable")
+        np.take(key, sa, out=sorted_key)
+        changed[0] = False
+        np.not_equal(sorted_key[1:], sorted_key[:-1], out=changed[1:])
+        np.cumsum(changed, out=new_rank)
+        rank[sa] = new_rank
+        if new_rank[-1] == n - 1:
+            break
+        k <<= 1
+
+    return sa.astype(np.int32)
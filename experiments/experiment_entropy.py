@@ -25,7 +25,7 @@ def compute_block_entropy(path: str, block_size: int) -> float:
             block = f.read(block_size)
             if not block:
                 break
-            last_column, _ = BWTCompressor.bwt_transform(block)
+            last_column, _ = BWTCompressor.bwt_transform(block, "numpy")
             transformed = mtf.compress(last_column)
             e = entropy(transformed)
             total_entropy += e * len(block)
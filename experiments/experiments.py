@@ -5,6 +5,7 @@ import time
 from compressor.LZSS import LZSSCompressor
 from compressor.LZW import LZWCompressor
 from compressor.bwt import BWTCompressor
+from compressor.bzip2_like import Bzip2LikeCompressor
 from compressor.combined import CombinedCompressor
 from compressor.ha import HACompressor
 from compressor.lz77 import LZ77Compressor
@@ -37,11 +38,14 @@ class ExperimentRunner:
             "LZW": LZWCompressor(),
             "BWT+RLE": CombinedCompressor([BWTCompressor(block_size=512), RLECompressor()]),
             "BWT+MTF+HA": CombinedCompressor([BWTCompressor(block_size=512), MTFCompressor(), HACompressor()]),
+            "BWT+MTF+HA4": CombinedCompressor(
+                [BWTCompressor(block_size=512), MTFCompressor(), HACompressor(tables=4)]),
             "BWT+MTF+RLE+HA": CombinedCompressor(
                 [BWTCompressor(block_size=512),
                  MTFCompressor(),
-                 RLECompressor(),
+                 RLECompressor(mode="zero_run"),
                  HACompressor()]),
+            "BZIP2-like": Bzip2LikeCompressor(),
             "LZSS+HA": CombinedCompressor(
                 [LZSSCompressor(window_size=10000, lookahead_buffer_size=500, min_match_length=3),
                  HACompressor()]),